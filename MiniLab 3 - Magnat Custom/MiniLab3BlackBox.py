@@ -0,0 +1,134 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import os
+import time
+import struct
+
+try:
+    import mmap
+except ImportError:
+    mmap = None
+
+
+# This class is a black box recorder: a memory-mapped ring buffer file keeping the last
+# MIDI events received and sysex frames sent. Writes are plain fixed-size record stores
+# into the mapping, the OS keeps the file even if FL Studio crashes.
+# Decode it with tools/blackbox.py.
+
+
+## CONSTANT
+
+MAGIC = b'ML3B'
+VERSION = 1
+
+# magic, version, record size, capacity, last sequence number
+HEADER = struct.Struct('<4sHHII')
+HEADER_AREA = 128
+
+# time, sequence number, kind, status, data1, data2, length of the sysex
+RECORD = struct.Struct('<dIBBBBH')
+RECORD_SIZE = 128
+PAYLOAD_SIZE = RECORD_SIZE - RECORD.size
+
+# Record kinds
+KIND_IN = 1
+KIND_OUT = 2
+
+DEFAULT_CAPACITY = 8192
+
+# Box used by OnMidiMsg and send_to_device, None when not recording
+box = None
+
+
+class MiniLabBlackBox:
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY):
+        # Keep the previous buffer, it may hold the evidence of the last crash
+        if os.path.exists(path):
+            os.replace(path, path + '.prev')
+
+        size = HEADER_AREA + capacity * RECORD_SIZE
+        self._file = open(path, 'w+b')
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size, access=mmap.ACCESS_WRITE)
+        self._capacity = capacity
+        self._seq = 0
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, RECORD_SIZE, capacity, 0)
+
+    def _next_offset(self):
+        self._seq += 1
+        # Sequence number is the last field of the header
+        struct.pack_into('<I', self._map, HEADER.size - 4, self._seq)
+        return HEADER_AREA + (self._seq % self._capacity) * RECORD_SIZE
+
+    def LogIn(self, event):
+        offset = self._next_offset()
+        RECORD.pack_into(self._map, offset, time.time(), self._seq, KIND_IN,
+                         event.status & 0xFF, event.data1 & 0xFF, event.data2 & 0xFF, 0)
+
+    def LogOut(self, data):
+        offset = self._next_offset()
+        length = len(data)
+        RECORD.pack_into(self._map, offset, time.time(), self._seq, KIND_OUT, 0, 0, 0, length)
+        if length > PAYLOAD_SIZE:
+            length = PAYLOAD_SIZE
+        start = offset + RECORD.size
+        self._map[start:start + length] = data[:length]
+
+    def Close(self):
+        self._map.flush()
+        self._map.close()
+        self._file.close()
+
+
+def Open(path, capacity=DEFAULT_CAPACITY):
+    # Starts recording into path, returns the box or None if memory mapping is not available
+    global box
+    if mmap is None:
+        print('Black box disabled: mmap is not available')
+        return None
+    try:
+        box = MiniLabBlackBox(path, capacity)
+    except (OSError, ValueError) as error:
+        print('Black box disabled:', error)
+        box = None
+    return box
+
+
+def Close():
+    global box
+    if box is not None:
+        box.Close()
+        box = None
+
+
+def ReadBlackBox(path):
+    # Returns the records of a black box file, oldest first, as tuples
+    # (sequence number, time, kind, status, data1, data2, sysex payload, original sysex length)
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, record_size, capacity, last_seq = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('%s is not a MiniLab 3 black box (version %d)' % (path, VERSION))
+
+    records = []
+    for i in range(capacity):
+        offset = HEADER_AREA + i * record_size
+        timestamp, seq, kind, status, data1, data2, length = RECORD.unpack_from(data, offset)
+        if seq == 0 or seq > last_seq:
+            continue
+        payload = b''
+        if kind == KIND_OUT:
+            start = offset + RECORD.size
+            payload = data[start:start + min(length, record_size - RECORD.size)]
+        records.append((seq, timestamp, kind, status, data1, data2, payload, length))
+    records.sort()
+    return records
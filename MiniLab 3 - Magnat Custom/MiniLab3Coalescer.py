@@ -0,0 +1,60 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import time
+
+
+# This class holds back the values of the continuous controls (knobs, faders).
+# A fast move sends dozens of CC per idle tick, each one setting a plugin parameter or a mixer
+# level and rebuilding the screen. Only the newest value of each (control, target) matters:
+# the others are dropped and the newest one is applied once, on the next OnIdle or when the
+# oldest value waiting gets older than the maximum delay.
+
+
+## CONSTANT
+
+# A value never waits longer than this, even when OnIdle is late
+DEFAULT_MAX_DELAY_S = 0.05
+
+
+class MiniLabCoalescer:
+
+    def __init__(self, max_delay_s=DEFAULT_MAX_DELAY_S):
+        self._max_delay_s = max_delay_s
+        # (control, target) -> (apply_fn, event), in the order the controls were first moved
+        self._pending = {}
+        # Time the oldest pending value came in
+        self._since = 0.0
+        # Values replaced by a newer one before being applied
+        self.dropped = 0
+
+    def Defer(self, key, apply_fn, event):
+        # Keeps event as the newest value of key, apply_fn(event) runs when it is flushed
+        pending = self._pending
+        if not pending:
+            self._since = time.perf_counter()
+        elif key in pending:
+            self.dropped += 1
+        pending[key] = (apply_fn, event)
+
+        if time.perf_counter() - self._since >= self._max_delay_s:
+            self.Flush()
+
+    def Flush(self):
+        # Applies the newest value of every control moved since the last flush
+        if not self._pending:
+            return
+        pending = self._pending
+        self._pending = {}
+        for apply_fn, event in pending.values():
+            apply_fn(event)
+
+    def Pending(self):
+        return len(self._pending)
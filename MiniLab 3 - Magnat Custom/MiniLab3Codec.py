@@ -0,0 +1,129 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+from MiniLab3Dispatch import SYSEX_HEADER, SYSEX_END
+
+
+# Builds the sysex frames sent to the controller, header and F7 included, ready for send_frame.
+# The same few frames are sent over and over (a pad switching between two colors, the screen
+# showing the same page), so every frame is kept and given back as the same bytes object the
+# next time. Frames that are not known yet are written into a preallocated buffer.
+
+
+## CONSTANT
+
+PAD_PREFIX = bytes([0x02, 0x02, 0x16])
+ALL_PADS_PREFIX = bytes([0x04, 0x02, 0x16, 0x00])
+SCREEN_PREFIX = bytes([0x04, 0x02, 0x60])
+
+ALL_PADS_COLORS = 24
+
+# Screen types
+SCREEN_DEFAULT = 1
+SCREEN_TWO_LINES = 2
+SCREEN_ENCODER = 3
+SCREEN_FADER = 4
+SCREEN_SCROLL = 5
+SCREEN_PICTO = 10
+
+# Lines longer than this are cut, 31 chars are shown at most
+LINE_SIZE = 31
+
+# Frames kept per kind, the cache is emptied when full
+MAX_CACHED_FRAMES = 512
+
+_HEADER_SIZE = len(SYSEX_HEADER)
+
+# Large enough for the longest screen frame: prefix, 7 control bytes, two lines
+_buffer = bytearray(_HEADER_SIZE + len(SCREEN_PREFIX) + 7 + 2 * (LINE_SIZE + 2) + 1)
+_buffer[:_HEADER_SIZE] = SYSEX_HEADER
+_view = memoryview(_buffer)
+
+_pad_frames = {}
+_all_pads_frames = {}
+_screen_frames = {}
+
+
+def frame(payload):
+    # Frame of any payload, not cached
+    return SYSEX_HEADER + bytes(payload) + bytes([SYSEX_END])
+
+
+def _keep(cache, key, data):
+    if len(cache) >= MAX_CACHED_FRAMES:
+        cache.clear()
+    cache[key] = data
+    return data
+
+
+def pad_color(pad, rgb):
+    # One pad LED. rgb holds the 3 color bytes (the 16 pads matrix adds a 4th one)
+    key = (pad, *rgb)
+    data = _pad_frames.get(key)
+    if data is None:
+        data = _keep(_pad_frames, key, frame(PAD_PREFIX + bytes([pad, *rgb])))
+    return data
+
+
+def all_pads(colors):
+    # The 8 pad LEDs at once, colors holds 24 bytes (r, g, b of each pad)
+    key = bytes(colors)
+    data = _all_pads_frames.get(key)
+    if data is None:
+        end = _HEADER_SIZE
+        _buffer[end:end + len(ALL_PADS_PREFIX)] = ALL_PADS_PREFIX
+        end += len(ALL_PADS_PREFIX)
+        _buffer[end:end + ALL_PADS_COLORS] = key
+        end += ALL_PADS_COLORS
+        _buffer[end] = SYSEX_END
+        data = _keep(_all_pads_frames, key, bytes(_view[:end + 1]))
+    return data
+
+
+def _screen_control(page_type, value):
+    # Bytes choosing the kind of screen, value is a percentage for the encoder and fader screens
+    # and the (record, play) status for the picto screen
+    if page_type == SCREEN_TWO_LINES:
+        return (0x1F, 0x02, 0x01, 0x00)
+    if page_type == SCREEN_ENCODER:
+        return (0x1F, 0x03, 0x01, int(int(value)*127/100), 0x00, 0x00)
+    if page_type == SCREEN_FADER:
+        return (0x1F, 0x04, 0x01, int(int(value)*127/100), 0x00, 0x00)
+    if page_type == SCREEN_SCROLL:
+        return (0x1F, 0x05, 0x01, 0x00, 0x00, 0x00)
+    if page_type == SCREEN_PICTO:
+        return (0x1F, 0x07, 0x01, value[0], value[1], 0x01, 0x00)
+    return ()
+
+
+def screen(page_type, value, line1, line2):
+    # The screen: kind, value and the two lines (ascii text)
+    key = (page_type, value, line1, line2)
+    data = _screen_frames.get(key)
+    if data is None:
+        line1 = line1.encode('ascii')[:LINE_SIZE]
+        line2 = line2.encode('ascii')[:LINE_SIZE]
+        end = _HEADER_SIZE
+        _buffer[end:end + len(SCREEN_PREFIX)] = SCREEN_PREFIX
+        end += len(SCREEN_PREFIX)
+        control = _screen_control(page_type, value)
+        _buffer[end:end + len(control)] = bytes(control)
+        end += len(control)
+        _buffer[end] = 0x01
+        _buffer[end + 1:end + 1 + len(line1)] = line1
+        end += 1 + len(line1)
+        _buffer[end] = 0x00
+        _buffer[end + 1] = 0x02
+        _buffer[end + 2:end + 2 + len(line2)] = line2
+        end += 2 + len(line2)
+        _buffer[end] = 0x00
+        _buffer[end + 1] = SYSEX_END
+        data = _keep(_screen_frames, key, bytes(_view[:end + 2]))
+    return data
@@ -8,7 +8,11 @@
 ]]
 """
 
+import time
 import device
+from array import array
+
+import MiniLab3BlackBox
 
 # MIT License
 # Copyright (c) 2020 Ray Juang
@@ -20,6 +24,125 @@ import device
 # time. This value is then used as a key into a lookup table that provides a dispatcher and filter function. If the
 # filter function returns true, then the event is sent to the dispatcher function.
 
+## CONSTANT
+
+# Handler timing histograms: bucket i counts the calls that took less than 2**i microseconds,
+# the last bucket counts everything slower.
+HISTOGRAM_BUCKETS = 24
+
+
+class HandlerHistogram:
+    # Preallocated log2 histogram of the wall time of one handler
+
+    __slots__ = ('name', 'count', 'total', 'max', 'buckets')
+
+    def __init__(self, name):
+        self.name = name
+        self.buckets = array('L', [0]) * HISTOGRAM_BUCKETS
+        self.Reset()
+
+    def Reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        for i in range(HISTOGRAM_BUCKETS):
+            self.buckets[i] = 0
+
+    def Add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        bucket = int(seconds * 1000000).bit_length()
+        if bucket >= HISTOGRAM_BUCKETS:
+            bucket = HISTOGRAM_BUCKETS - 1
+        self.buckets[bucket] += 1
+
+    def Percentile(self, q):
+        # Upper bound in microseconds of the bucket holding the q quantile (0 < q <= 1)
+        if self.count == 0:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for i in range(HISTOGRAM_BUCKETS):
+            seen += self.buckets[i]
+            if seen >= rank:
+                return 1 << i
+        return 1 << (HISTOGRAM_BUCKETS - 1)
+
+
+# Histograms of every handler ever registered, by handler name
+_handler_histograms = {}
+
+# Every dispatcher created, so that timing can be switched on all of them at once
+_dispatchers = []
+
+_timing = False
+
+
+def EnableHandlerTiming(enabled=True):
+    # Switches every dispatcher between the plain and the timed Dispatch.
+    # When disabled the plain method is used directly, so timing costs nothing.
+    global _timing
+    _timing = enabled
+    for dispatcher in _dispatchers:
+        dispatcher._set_timing(enabled)
+
+
+def _histogram(name):
+    if name not in _handler_histograms:
+        _handler_histograms[name] = HandlerHistogram(name)
+    return _handler_histograms[name]
+
+
+def TimeHandler(callback_fn, name):
+    # For the work a handler leaves for later (a value applied on the next OnIdle): callback_fn
+    # recording its wall time under name when the handlers are timed, callback_fn itself otherwise
+    if not _timing:
+        return callback_fn
+    histogram = _histogram(name)
+
+    def timed_fn(*args):
+        start = time.perf_counter()
+        result = callback_fn(*args)
+        histogram.Add(time.perf_counter() - start)
+        return result
+    return timed_fn
+
+
+def GetHandlerTimes():
+    # Histograms of the handlers called at least once, slowest mean first
+    histograms = [h for h in _handler_histograms.values() if h.count]
+    histograms.sort(key=lambda h: h.total / h.count, reverse=True)
+    return histograms
+
+
+def ResetHandlerTimes():
+    for histogram in _handler_histograms.values():
+        histogram.Reset()
+
+
+def DumpHandlerTimes():
+    # Prints the handler times in the script output window
+    print('%-26s %8s %10s %8s %8s %10s' % ('handler', 'calls', 'mean us', 'p50 <', 'p99 <', 'max us'))
+    for h in GetHandlerTimes():
+        print('%-26s %8d %10.1f %8d %8d %10.1f' % (
+            h.name, h.count, 1000000 * h.total / h.count, h.Percentile(0.5), h.Percentile(0.99), 1000000 * h.max))
+
+
+# Transform functions. The compiled dispatcher knows how to resolve these ones ahead of time.
+def by_midi_id(event) : return event.midiId
+def by_control_num(event) : return event.controlNum
+def by_velocity(event) : return event.data2
+def by_status(event) : return event.status
+def by_sysex(event) : return event.sysex
+
+# Filter functions
+def _default_true_fn(_): return True
+def ignore_release(event): return event.controlVal != 0
+def ignore_press(event): return event.controlVal == 0
+
+
 class MidiEventDispatcher:
 
 
@@ -27,6 +150,9 @@ class MidiEventDispatcher:
         self._transform_fn = transform_fn
         # Table contains a mapping of status code -> (callback_fn, filter_fn)
         self._dispatch_map = {}
+        # Same keys, mapping to the HandlerHistogram of the callback
+        self._histogram_map = {}
+        _dispatchers.append(self)
 
 
     def NewHandler(self, key, callback_fn, filter_fn =None):
@@ -38,11 +164,16 @@ class MidiEventDispatcher:
         # is returned, then the event is dropped and never passed to callback_fn. Not specifying means that callback_fn
         # is always called if transform_fn matches the key.
 
-        
-        def _default_true_fn(_): return True
         if filter_fn is None:
             filter_fn = _default_true_fn
         self._dispatch_map[key] = (callback_fn, filter_fn)
+
+        # A nested dispatcher is not a handler, its own handlers are timed
+        if _is_dispatch(callback_fn):
+            self._histogram_map[key] = None
+            return self
+
+        self._histogram_map[key] = _histogram(callback_fn.__name__)
         return self
 
 
@@ -55,6 +186,14 @@ class MidiEventDispatcher:
         return self
 
 
+    def Copy(self):
+        # New dispatcher with the same transform and handlers, to build a variant of this one
+        copy = MidiEventDispatcher(self._transform_fn)
+        copy._dispatch_map.update(self._dispatch_map)
+        copy._histogram_map.update(self._histogram_map)
+        return copy
+
+
     def Dispatch(self, event):
         # This function will dispatch the event
     
@@ -67,8 +206,413 @@ class MidiEventDispatcher:
         return False
 
 
+    def _timed_dispatch(self, event):
+        # Same as Dispatch, also recording the wall time of the handler
+
+        key = self._transform_fn(event)
+        if key in self._dispatch_map:
+            callback_fn, filter_fn = self._dispatch_map[key]
+            if filter_fn(event):
+                histogram = self._histogram_map[key]
+                if histogram is None:
+                    # Nested dispatcher: its Dispatch is looked up now, so that its leaves are timed too
+                    return callback_fn.__self__.Dispatch(event)
+                start = time.perf_counter()
+                result = callback_fn(event)
+                histogram.Add(time.perf_counter() - start)
+                return result
+
+        return False
+
+
+    def _set_timing(self, enabled):
+        if enabled:
+            self.Dispatch = self._timed_dispatch
+        else:
+            self.__dict__.pop('Dispatch', None)
+
+
+def _is_dispatch(callback_fn):
+    # True when callback_fn is the Dispatch method of another dispatcher
+    return (isinstance(getattr(callback_fn, '__self__', None), MidiEventDispatcher)
+            and getattr(callback_fn, '__func__', None) is MidiEventDispatcher.Dispatch)
+
+
+# Compiled entry flags
+FLAG_ONLY_PRESSED = 1   # ignore_release
+FLAG_ONLY_RELEASED = 2  # ignore_press
+FLAG_FILTER = 4         # Any other filter, called before the handler
+FLAG_BY_VELOCITY = 8    # The handler depends on data2, the entry holds a table indexed by data2
+
+_FILTER_FLAGS = {
+    _default_true_fn : 0,
+    ignore_release : FLAG_ONLY_PRESSED,
+    ignore_press : FLAG_ONLY_RELEASED,
+}
+
+# Channel messages, the only ones going through the dispatchers
+COMPILED_STATUS = range(0x80, 0xF0)
+
+
+class CompiledMidiEventDispatcher:
+    # Flattens a tree of MidiEventDispatcher into a single table indexed by (status, data1).
+    # Each entry is (callback_fn, flags, extra, histogram): the filters met on the way down are
+    # folded into flags, so an event costs one lookup and one call whatever the depth of the tree.
+    # Handlers are still registered on the MidiEventDispatcher, call Compile() after changing them.
+
+    def __init__(self, root):
+        self._root = root
+        self._table = None
+        self.Compile()
+        _dispatchers.append(self)
+
+
+    def Compile(self):
+        table = [None] * (256 * 128)
+        for status in COMPILED_STATUS:
+            for data1 in range(128):
+                table[(status << 7) | data1] = self._resolve(self._root, status, data1, None, 0, None)
+        self._table = table
+
+
+    def Lookup(self, status, data1):
+        # The compiled entry of (status, data1), None if no handler
+        return self._table[(status << 7) | data1]
+
+
+    def _resolve(self, dispatcher, status, data1, data2, flags, filter_fn):
+        # Walks the dispatchers as Dispatch would for any event starting with (status, data1)
+        transform_fn = dispatcher._transform_fn
+        if transform_fn is by_midi_id:
+            key = status & 0xF0
+        elif transform_fn is by_status:
+            key = status
+        elif transform_fn is by_control_num:
+            key = data1
+        elif transform_fn is by_velocity:
+            if data2 is None:
+                velocity_table = [self._resolve(dispatcher, status, data1, value, flags, filter_fn) for value in range(128)]
+                if not any(velocity_table):
+                    return None
+                return (None, FLAG_BY_VELOCITY, velocity_table, None)
+            key = data2
+        else:
+            raise ValueError('Cannot compile a dispatcher using ' + transform_fn.__name__)
+
+        entry = dispatcher._dispatch_map.get(key)
+        if entry is None:
+            return None
+
+        callback_fn, entry_filter_fn = entry
+        if entry_filter_fn in _FILTER_FLAGS:
+            flags |= _FILTER_FLAGS[entry_filter_fn]
+        elif filter_fn is None:
+            filter_fn = entry_filter_fn
+            flags |= FLAG_FILTER
+        else:
+            outer_filter_fn = filter_fn
+            filter_fn = lambda event: outer_filter_fn(event) and entry_filter_fn(event)
+
+        # Both filters at once, nothing can get through
+        if flags & FLAG_ONLY_PRESSED and flags & FLAG_ONLY_RELEASED:
+            return None
+
+        if _is_dispatch(callback_fn):
+            return self._resolve(callback_fn.__self__, status, data1, data2, flags, filter_fn)
+
+        return (callback_fn, flags, filter_fn, dispatcher._histogram_map[key])
+
+
+    def Dispatch(self, event):
+        entry = self._table[(event.status << 7) | event.data1]
+        if entry is None:
+            return False
+
+        callback_fn, flags, extra, _ = entry
+        if flags:
+            if flags & FLAG_BY_VELOCITY:
+                entry = extra[event.data2]
+                if entry is None:
+                    return False
+                callback_fn, flags, extra, _ = entry
+            if flags & FLAG_ONLY_PRESSED and event.controlVal == 0:
+                return False
+            if flags & FLAG_ONLY_RELEASED and event.controlVal != 0:
+                return False
+            if flags & FLAG_FILTER and not extra(event):
+                return False
+
+        return callback_fn(event)
+
+
+    def _timed_dispatch(self, event):
+        # Same as Dispatch, also recording the wall time of the handler
+        entry = self._table[(event.status << 7) | event.data1]
+        if entry is None:
+            return False
+
+        if entry[1] & FLAG_BY_VELOCITY:
+            entry = entry[2][event.data2]
+            if entry is None:
+                return False
+
+        callback_fn, flags, extra, histogram = entry
+        if flags & FLAG_ONLY_PRESSED and event.controlVal == 0:
+            return False
+        if flags & FLAG_ONLY_RELEASED and event.controlVal != 0:
+            return False
+        if flags & FLAG_FILTER and not extra(event):
+            return False
+
+        start = time.perf_counter()
+        result = callback_fn(event)
+        histogram.Add(time.perf_counter() - start)
+        return result
+
+
+    def _set_timing(self, enabled):
+        if enabled:
+            self.Dispatch = self._timed_dispatch
+        else:
+            self.__dict__.pop('Dispatch', None)
+
+
+
+
+# Every sysex exchanged with the MiniLab 3 starts with this header and ends with F7
+SYSEX_HEADER = bytes([0xF0, 0x00, 0x20, 0x6B, 0x7F, 0x42])
+SYSEX_END = 0xF7
+SYSEX_TRAILER = bytes([SYSEX_END])
+
+
+def ParseSysex(sysex):
+    # Payload of a MiniLab 3 sysex, without header and F7. None if it comes from something else.
+    if not sysex or not sysex.startswith(SYSEX_HEADER):
+        return None
+    end = len(sysex) - 1 if sysex[-1] == SYSEX_END else len(sysex)
+    return sysex[len(SYSEX_HEADER):end]
+
+
+class SysexDispatcher:
+    # Routes the sysex sent by the controller on a prefix trie of their payload.
+    # Each frame is parsed once, then walked byte by byte down the trie: the handler of the
+    # longest registered prefix is called with the payload. Registering a new reply costs nothing
+    # to the others, there is no linear comparison.
+
+    def __init__(self):
+        # byte -> node, the handler of a prefix is stored under the None key of its node
+        self._trie = {}
+
+
+    def NewHandler(self, prefix, callback_fn):
+        # param prefix: first bytes of the payload (after the header) handled by callback_fn
+        # param callback_fn: function called with the payload of the matching frames
+        node = self._trie
+        for byte in prefix:
+            node = node.setdefault(byte, {})
+        node[None] = callback_fn
+        return self
+
+
+    def Dispatch(self, sysex):
+        payload = ParseSysex(sysex)
+        if payload is None:
+            return False
+
+        node = self._trie
+        callback_fn = node.get(None)
+        for byte in payload:
+            node = node.get(byte)
+            if node is None:
+                break
+            callback_fn = node.get(None, callback_fn)
+
+        if callback_fn is None:
+            return False
+        return callback_fn(payload)
+
+
+
+
+
+# Outgoing sysex categories
+TRAFFIC_DISPLAY = 'display'
+TRAFFIC_PAD = 'pad'
+TRAFFIC_ALL_PADS = 'all pads'
+TRAFFIC_CONNECTION = 'connection'
+TRAFFIC_OTHER = 'other'
+
+TRAFFIC_CATEGORIES = (TRAFFIC_DISPLAY, TRAFFIC_PAD, TRAFFIC_ALL_PADS, TRAFFIC_CONNECTION, TRAFFIC_OTHER)
+
+# First 3 bytes of the payload -> (category, number of payload bytes naming the target)
+TRAFFIC_PREFIXES = {
+    b'\x04\x02\x60' : (TRAFFIC_DISPLAY, 3),     # Screen
+    b'\x02\x02\x16' : (TRAFFIC_PAD, 4),         # One LED, the 4th byte is its id
+    b'\x04\x02\x16' : (TRAFFIC_ALL_PADS, 3),    # Every pad LED at once
+    b'\x02\x02\x40' : (TRAFFIC_CONNECTION, 4),  # DAW / Arturia mode
+    b'\x04\x01\x60' : (TRAFFIC_CONNECTION, 3),  # Arturia mode screen
+    b'\x01\x00\x40' : (TRAFFIC_CONNECTION, 4),  # Memory request
+}
+
+# Target of the single pad frames, followed by the pad id
+PAD_TARGET_PREFIX = b'\x02\x02\x16'
+
+# Header and trailer added by send_to_device
+SYSEX_FRAMING = 7
+
+
+class TrafficMeter:
+    # Counts the sysex sent to the controller, per category
+
+    def __init__(self):
+        self.Reset()
+
+    def Reset(self):
+        self.messages = dict.fromkeys(TRAFFIC_CATEGORIES, 0)
+        self.bytes = dict.fromkeys(TRAFFIC_CATEGORIES, 0)
+        # Frames identical to the last one sent to the same target
+        self.duplicates = dict.fromkeys(TRAFFIC_CATEGORIES, 0)
+        self._last_frames = {}
+        self._summary_time = time.monotonic()
+        self._summary_bytes = 0
+
+    def Count(self, data):
+        category, target_size = TRAFFIC_PREFIXES.get(bytes(data[:3]), (TRAFFIC_OTHER, 3))
+        data = bytes(data)
+        target = data[:target_size]
+        self.messages[category] += 1
+        self.bytes[category] += len(data) + SYSEX_FRAMING
+        if self._last_frames.get(target) == data:
+            self.duplicates[category] += 1
+        self._last_frames[target] = data
+
+    def TotalBytes(self):
+        return sum(self.bytes.values())
+
+    def Summary(self):
+        # Text summary, with the rate since the previous summary
+        now = time.monotonic()
+        total = self.TotalBytes()
+        elapsed = now - self._summary_time
+        rate = (total - self._summary_bytes) / elapsed if elapsed > 0 else 0
+        self._summary_time = now
+        self._summary_bytes = total
+        lines = ['Sysex out: %d bytes/s' % rate]
+        for category in TRAFFIC_CATEGORIES:
+            lines.append('  %-11s %7d msg %9d bytes %7d duplicates' % (
+                category, self.messages[category], self.bytes[category], self.duplicates[category]))
+        return '\n'.join(lines)
+
+
+_traffic = TrafficMeter()
+
+
+def GetTraffic():
+    # The meter counting everything sent by send_to_device
+    return _traffic
+
 
 def send_to_device(data) :
     #The only function that will sens SysEx data to the controller
-    device.midiOutSysex(bytes([0xF0, 0x00, 0x20, 0x6B, 0x7F, 0x42]) + data + bytes([0xF7]))
+    send_frame(SYSEX_HEADER + data + SYSEX_TRAILER)
+
+
+def send_frame(frame) :
+    # Sends a frame that already has its header and F7, as built by MiniLab3Codec.
+    # With the output queue, the frame waits for the next flush and replaces the one
+    # already waiting for the same target.
+    if _output is not None:
+        _output.Put(frame)
+    else:
+        _write(frame)
+
+
+def _write(frame) :
+    payload = memoryview(frame)[len(SYSEX_HEADER):-1]
+    _traffic.Count(payload)
+    if MiniLab3BlackBox.box is not None:
+        MiniLab3BlackBox.box.LogOut(payload)
+    device.midiOutSysex(frame)
+
+
+# Queue the frames and send only the newest one per target (screen, each pad, all pads, connection),
+# flushed by OnIdle or at the end of a callback once the oldest frame waited OUTPUT_MAX_DELAY_S
+QUEUE_OUTPUT = True
+OUTPUT_MAX_DELAY_S = 0.02
+
+# The pads set by an all pads frame
+ALL_PADS_IDS = range(0x04, 0x0C)
+
+
+class OutputQueue:
+    # Frames waiting to be sent, by target, in the order they were last queued
+
+    def __init__(self, max_delay_s):
+        self._max_delay_s = max_delay_s
+        self._frames = {}
+        # Time the oldest waiting frame was queued
+        self._since = 0.0
+        # Frames that have no target are all sent, each under its own key
+        self._others = 0
+        # Frames replaced by a newer one before being sent
+        self.replaced = 0
+
+    def Put(self, frame):
+        header = len(SYSEX_HEADER)
+        category, target_size = TRAFFIC_PREFIXES.get(frame[header:header + 3], (TRAFFIC_OTHER, 3))
+        if category == TRAFFIC_OTHER:
+            self._others += 1
+            key = self._others
+        else:
+            key = frame[header:header + target_size]
+
+        frames = self._frames
+        if not frames:
+            self._since = time.perf_counter()
+        elif key in frames:
+            # Removed first so that the newer frame goes after the ones queued since
+            del frames[key]
+            self.replaced += 1
+
+        if category == TRAFFIC_ALL_PADS:
+            # Every single pad frame waiting is overwritten by this one
+            for pad in ALL_PADS_IDS:
+                if frames.pop(PAD_TARGET_PREFIX + bytes([pad]), None) is not None:
+                    self.replaced += 1
+
+        frames[key] = frame
+
+    def Flush(self):
+        if not self._frames:
+            return
+        frames = self._frames
+        self._frames = {}
+        for frame in frames.values():
+            _write(frame)
+
+    def IsDue(self):
+        return bool(self._frames) and time.perf_counter() - self._since >= self._max_delay_s
+
+    def Pending(self):
+        return len(self._frames)
+
+
+_output = OutputQueue(OUTPUT_MAX_DELAY_S) if QUEUE_OUTPUT else None
+
+
+def GetOutputQueue():
+    # The queue in front of device.midiOutSysex, None when QUEUE_OUTPUT is off
+    return _output
+
+
+def FlushOutput():
+    # Sends every frame waiting, called by OnIdle and before anything that waits (sleep, exit)
+    if _output is not None:
+        _output.Flush()
+
+
+def EndOfCallback():
+    # Called at the end of each FL callback, sends the waiting frames if the oldest one is late
+    if _output is not None and _output.IsDue():
+        _output.Flush()
     
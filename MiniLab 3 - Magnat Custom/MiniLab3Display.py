@@ -13,7 +13,8 @@ import channels
 import transport
 import mixer
 import ui
-from MiniLab3Dispatch import send_to_device
+from MiniLab3Dispatch import send_frame
+import MiniLab3Codec
 
 # MIT License
 # Copyright (c) 2020 Ray Juang
@@ -55,23 +56,23 @@ class MiniLabDisplay:
         # Track what's currently being displayed
         self._last_payload = bytes()
         
-    def _get_line1_bytes(self):
+    def _get_line1_text(self):
         # Get up to 32-bytes the exact chars to display for line 1.
         start_pos = self._line1_display_offset
         end_pos = start_pos + 31
         line_src = self._get_line_src(self._line1)
         if self._expiration_time_ms > self.time_ms():
             line_src = self._get_line_src(self._ephemeral_line1)
-        return bytearray(line_src[start_pos:end_pos], 'ascii')
+        return line_src[start_pos:end_pos]
 
-    def _get_line2_bytes(self):
+    def _get_line2_text(self):
         # Get up to 32-bytes the exact chars to display for line 2.
         start_pos = self._line2_display_offset
         end_pos = start_pos + 31
         line_src = self._get_line_src(self._line2)
         if self._expiration_time_ms > self.time_ms():
             line_src = self._get_line_src(self._ephemeral_line2)
-        return bytearray(line_src[start_pos:end_pos], 'ascii')
+        return line_src[start_pos:end_pos]
 
     def _get_new_offset(self, start_pos, line_src):
         end_pos = start_pos + 31
@@ -95,54 +96,19 @@ class MiniLabDisplay:
 
     def _refresh_display(self, page_type, value):
         # Internally called to refresh the display now.
-        string = []
-        
-        data_control = bytes([])
-        data_string = bytes([0x04, 0x02, 0x60])
-        data_line1 = bytes([0x01]) + self._get_line1_bytes() + bytes([0x00])
-        data_line2 = bytes([0x02]) + self._get_line2_bytes() + bytes([0x00])
-        #data += bytes([0x7F])
-        
-        if page_type == 1 :
-            #print("Defaut")
-            #Defaut Screen
-            data_control = bytes([])
-        
-        elif page_type == 2 :
-            #print("Two Lines")
-            #Two Lines Screen
-            data_control += bytes([0x1F, 0x02, 0x01, 0x00])
-            
-        elif page_type == 3 :
-            #print("Encoder")
-            #Encoder Screen
-            scaled_value = int(int(value)*127/100)
-            data_control += bytes([0x1F, 0x03, 0x01, scaled_value, 0x00, 0x00])
-            
-        elif page_type == 4 :
-            #print("Fader")
-            #Fader Screen
-            scaled_value = int(int(value)*127/100)
-            data_control += bytes([0x1F, 0x04, 0x01, scaled_value, 0x00, 0x00])
-            
-        elif page_type == 5 :
-            #print("scroll")
-            #Scroll Screen
-            data_control += bytes([0x1F, 0x05, 0x01, 0x00, 0x00, 0x00])
-            
-        elif page_type == 10 :
-            #print("Picto")
-            #Picto Screen
-            data_control += bytes([0x1F, 0x07, 0x01, REC_STATUS[transport.isRecording()], PLAY_STATUS[transport.isPlaying() != 0], 0x01, 0x00])
-            
-        
-        string = data_string + data_control + data_line1 + data_line2
+        if page_type == MiniLab3Codec.SCREEN_PICTO :
+            value = (REC_STATUS[transport.isRecording()], PLAY_STATUS[transport.isPlaying() != 0])
+        elif page_type not in (MiniLab3Codec.SCREEN_ENCODER, MiniLab3Codec.SCREEN_FADER) :
+            # The value is only shown by the encoder and fader screens
+            value = 0
+
+        frame = MiniLab3Codec.screen(page_type, value, self._get_line1_text(), self._get_line2_text())
 
         #self._update_scroll_pos()
-        if self._last_payload != string:
-            send_to_device(string)
+        if self._last_payload != frame:
+            send_frame(frame)
             #print(page_type)
-            self._last_payload = string
+            self._last_payload = frame
 
     def ResetScroll(self):
         self._line1_display_offset = 0
@@ -0,0 +1,38 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+
+# This class is a copy of the FL Studio event, taken once when the event comes in.
+# Every read of the FL event goes through the host, the handlers read the copy instead.
+# The fields the handlers change are written back to the FL event once they are done.
+
+
+class MiniLabEvent:
+
+    __slots__ = ('status', 'data1', 'data2', 'midiId', 'controlNum', 'controlVal', 'handled', '_data1', '_data2')
+
+    def __init__(self, event):
+        self.status = event.status
+        self.data1 = self._data1 = event.data1
+        self.data2 = self._data2 = event.data2
+        self.midiId = event.midiId
+        self.controlNum = event.controlNum
+        self.controlVal = event.controlVal
+        # None until a handler sets it
+        self.handled = None
+
+    def WriteBack(self, event):
+        # Copies the fields changed by the handlers (snap to scale note, handled...) to the FL event
+        if self.data1 != self._data1:
+            event.data1 = self.data1
+        if self.data2 != self._data2:
+            event.data2 = self.data2
+        if self.handled is not None:
+            event.handled = self.handled
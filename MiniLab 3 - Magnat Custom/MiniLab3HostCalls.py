@@ -0,0 +1,180 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import sys
+
+import MiniLab3Dispatch
+
+
+# Debug mode counting the FL Studio API calls made by the script.
+# The FL modules imported by the script modules are replaced by counting proxies, and
+# the calls are charged to every scope running: the FL entry point (OnMidiMsg, OnIdle...)
+# and the handler resolved by the dispatchers (Navigator, Plugin...).
+# Only meant for debugging: every host call becomes noticeably slower.
+
+
+## CONSTANT
+
+# FL modules replaced by counting proxies
+COUNTED_MODULES = ('ui', 'channels', 'plugins', 'mixer', 'transport')
+
+# Script modules in which the FL modules are replaced
+SCRIPT_MODULES = (
+    'device_MiniLab3',
+    'MiniLab3Process',
+    'MiniLab3Navigation',
+    'MiniLab3Return',
+    'MiniLab3Display',
+    'MiniLab3Pages',
+    'MiniLab3Plugin',
+    'MiniLab3Connexion',
+    'MiniLab3PitchBend',
+    'MiniLab3Scrub',
+    'ArturiaVCOL',
+)
+
+# FL entry points counted as scopes
+ENTRY_POINTS = ('OnMidiMsg', 'OnPitchBend', 'OnRefresh', 'OnIdle', 'OnUpdateBeatIndicator', 'OnSysEx')
+
+
+class ScopeCounts:
+    __slots__ = ('invocations', 'calls')
+
+    def __init__(self):
+        self.invocations = 0
+        # 'module.function' -> number of calls
+        self.calls = {}
+
+
+class HostCallCounter:
+
+    def __init__(self):
+        self._stack = []
+        self._scopes = {}
+        self._wrappers = {}
+
+    def Reset(self):
+        self._scopes = {}
+
+    def _scope(self, name):
+        scope = self._scopes.get(name)
+        if scope is None:
+            scope = self._scopes[name] = ScopeCounts()
+        return scope
+
+    def Count(self, function_name):
+        for scope in self._stack:
+            scope.calls[function_name] = scope.calls.get(function_name, 0) + 1
+
+    def Wrap(self, function_name, function):
+        # Host function counting its calls
+        def counted(*args, **kwargs):
+            self.Count(function_name)
+            return function(*args, **kwargs)
+        counted.__name__ = function.__name__
+        return counted
+
+    def Scoped(self, scope_name, function):
+        # Script function whose host calls are charged to scope_name
+        def scoped(*args, **kwargs):
+            scope = self._scope(scope_name)
+            scope.invocations += 1
+            self._stack.append(scope)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self._stack.pop()
+        scoped.__name__ = function.__name__
+        return scoped
+
+    def Scopes(self):
+        return self._scopes
+
+    def Dump(self, top=5):
+        # Prints the host calls per invocation of each scope, most expensive first
+        scopes = [(name, scope) for name, scope in self._scopes.items() if scope.invocations]
+        scopes.sort(key=lambda item: sum(item[1].calls.values()) / item[1].invocations, reverse=True)
+        for name, scope in scopes:
+            total = sum(scope.calls.values())
+            print('%-24s %7d calls %7.1f host calls per call' % (name, scope.invocations, total / scope.invocations))
+            calls = sorted(scope.calls.items(), key=lambda item: item[1], reverse=True)
+            for function_name, count in calls[:top]:
+                print('    %-36s %7.2f' % (function_name, count / scope.invocations))
+
+
+class CountingModule:
+    # Proxy of an FL module returning counting versions of its functions
+
+    def __init__(self, counter, module):
+        self._counter = counter
+        self._module = module
+
+    def __getattr__(self, name):
+        value = getattr(self._module, name)
+        if callable(value):
+            value = self._counter.Wrap(self._module.__name__ + '.' + name, value)
+        # Cache it, next lookups do not go through __getattr__
+        setattr(self, name, value)
+        return value
+
+
+_counter = HostCallCounter()
+
+
+def GetCounter():
+    return _counter
+
+
+def ScopeEntryPoints(namespace):
+    # Replaces the FL entry points of the device script namespace by scoped versions.
+    # Must run when the device script is imported, before FL Studio reads its callbacks.
+    for name in ENTRY_POINTS:
+        if name in namespace:
+            namespace[name] = _counter.Scoped(name, namespace[name])
+
+
+def Install():
+    # Replaces the FL modules of the script modules by counting proxies, and scopes every
+    # handler registered in the dispatchers
+    proxies = {}
+    for module_name in SCRIPT_MODULES:
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        for fl_name in COUNTED_MODULES:
+            fl_module = getattr(module, fl_name, None)
+            if fl_module is None or isinstance(fl_module, CountingModule):
+                continue
+            if fl_name not in proxies:
+                proxies[fl_name] = CountingModule(_counter, fl_module)
+            setattr(module, fl_name, proxies[fl_name])
+
+    dispatchers = MiniLab3Dispatch._dispatchers
+    for dispatcher in dispatchers:
+        if not isinstance(dispatcher, MiniLab3Dispatch.MidiEventDispatcher):
+            continue
+        for key, (callback_fn, filter_fn) in dispatcher._dispatch_map.items():
+            # Nested dispatchers are left as they are, their own handlers get scoped
+            if MiniLab3Dispatch._is_dispatch(callback_fn):
+                continue
+            dispatcher._dispatch_map[key] = (_counter.Scoped(callback_fn.__name__, callback_fn), filter_fn)
+
+    # The compiled tables hold the handlers themselves, build them again around the scoped ones
+    for dispatcher in dispatchers:
+        if isinstance(dispatcher, MiniLab3Dispatch.CompiledMidiEventDispatcher):
+            dispatcher.Compile()
+
+
+def DumpHostCalls(top=5):
+    _counter.Dump(top)
+
+
+def ResetHostCalls():
+    _counter.Reset()
@@ -0,0 +1,137 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import math
+import time
+from array import array
+
+
+# This class monitors the timing of the events coming from the controller, per control,
+# with the same (status, controlNum) keys as the dispatchers:
+# - inter-arrival mean and jitter while a control is moving,
+# - bursts: many events of one control within one idle tick (what coalescing would save),
+# - gaps: pauses in the middle of a move, a sign of late delivery by FL under load.
+# Every statistic lives in a preallocated array indexed by control slot.
+
+
+## CONSTANT
+
+# One slot per (status, controlNum), channel included like the dispatch table:
+# 0x80 to 0xEF statuses, 128 controls each
+SLOT_COUNT = 112 * 128
+
+# Two events closer than this belong to the same move
+ACTIVE_S = 0.5
+
+# A pause longer than this in the middle of a move is a gap
+GAP_S = 0.05
+
+# Events of one control within a single idle tick from which it is a burst
+BURST_EVENTS = 4
+
+# Weight of the last inter-arrival in the rolling mean and jitter
+EWMA_ALPHA = 1 / 16
+
+STATUS_NAMES = ('note off', 'note', 'aftertouch', 'cc', 'program', 'pressure', 'bend')
+
+
+def _slot(status, data1):
+    if status >= 0xE0:
+        # Pitch bend is a single control, data1 is its fine position
+        data1 = 0
+    return ((status - 0x80) << 7) | data1
+
+
+class MiniLabJitterMonitor:
+
+    def __init__(self):
+        self.Reset()
+
+    def Reset(self):
+        self.count = array('L', [0]) * SLOT_COUNT
+        self.last_time = array('d', [0.0]) * SLOT_COUNT
+        self.mean_dt = array('d', [0.0]) * SLOT_COUNT
+        self.var_dt = array('d', [0.0]) * SLOT_COUNT
+        self.max_gap = array('d', [0.0]) * SLOT_COUNT
+        self.gaps = array('L', [0]) * SLOT_COUNT
+        self.bursts = array('L', [0]) * SLOT_COUNT
+        self.max_burst = array('L', [0]) * SLOT_COUNT
+        # Events beyond the first one of each tick: what coalescing per tick would drop
+        self.coalescable = array('L', [0]) * SLOT_COUNT
+        self.tick_count = array('L', [0]) * SLOT_COUNT
+        # Slots touched during the current tick
+        self._touched = array('H', [0]) * SLOT_COUNT
+        self._touched_count = 0
+
+    def AddEvent(self, event):
+        status = event.status
+        if status < 0x80 or status >= 0xF0:
+            return
+        slot = _slot(status, event.data1)
+        now = time.perf_counter()
+
+        count = self.count[slot]
+        if count:
+            dt = now - self.last_time[slot]
+            if dt < ACTIVE_S:
+                if dt > GAP_S:
+                    self.gaps[slot] += 1
+                    if dt > self.max_gap[slot]:
+                        self.max_gap[slot] = dt
+                diff = dt - self.mean_dt[slot]
+                self.mean_dt[slot] += EWMA_ALPHA * diff
+                self.var_dt[slot] = (1 - EWMA_ALPHA) * (self.var_dt[slot] + EWMA_ALPHA * diff * diff)
+        self.count[slot] = count + 1
+        self.last_time[slot] = now
+
+        tick_count = self.tick_count[slot]
+        if tick_count == 0:
+            self._touched[self._touched_count] = slot
+            self._touched_count += 1
+        else:
+            self.coalescable[slot] += 1
+        self.tick_count[slot] = tick_count + 1
+
+    def Tick(self):
+        # Called from OnIdle: closes the burst statistics of the tick
+        for i in range(self._touched_count):
+            slot = self._touched[i]
+            tick_count = self.tick_count[slot]
+            if tick_count > self.max_burst[slot]:
+                self.max_burst[slot] = tick_count
+            if tick_count >= BURST_EVENTS:
+                self.bursts[slot] += 1
+            self.tick_count[slot] = 0
+        self._touched_count = 0
+
+    def Controls(self):
+        # (label, slot) of every control seen
+        controls = []
+        for slot in range(SLOT_COUNT):
+            if self.count[slot]:
+                status, data1 = divmod(slot, 128)
+                kind, channel = divmod(status, 16)
+                if kind == 6:
+                    label = '%s ch%d' % (STATUS_NAMES[kind], channel + 1)
+                else:
+                    label = '%s %d ch%d' % (STATUS_NAMES[kind], data1, channel + 1)
+                controls.append((label, slot))
+        return controls
+
+    def Dump(self):
+        # Prints the statistics of every control seen in the script output window
+        print('%-18s %8s %9s %9s %7s %7s %6s %10s %7s' % (
+            'control', 'events', 'mean ms', 'jitter ms', 'bursts', 'max/tk', 'gaps', 'max gap ms', 'coal %'))
+        for label, slot in self.Controls():
+            count = self.count[slot]
+            print('%-18s %8d %9.2f %9.2f %7d %7d %6d %10.1f %7.1f' % (
+                label, count, 1000 * self.mean_dt[slot], 1000 * math.sqrt(self.var_dt[slot]),
+                self.bursts[slot], self.max_burst[slot], self.gaps[slot], 1000 * self.max_gap[slot],
+                100.0 * self.coalescable[slot] / count))
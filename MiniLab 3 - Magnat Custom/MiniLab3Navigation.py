@@ -412,6 +412,34 @@ class NavigationMode:
                                             )
             self._paged_display.SetActivePage('GODMODEOFF', expires=self._display_ms)
             
+    def StatsRefresh(self, events_s, worst_ms, bytes_s) :
+        self._paged_display.SetPageLines('Stats',
+                                        2,
+                                        line1= '%dev/s max%.1fms' % (events_s, worst_ms),
+                                        line2= 'SysEx %dB/s' % bytes_s
+                                        )
+        self._paged_display.SetActivePage('Stats')
+
+
+    def StatsOff(self) :
+        self._paged_display.SetActivePage('main')
+        self._paged_display.SetPageLines('StatsOff',
+                                        10,
+                                        line1= 'Stats',
+                                        line2= 'OFF'
+                                        )
+        self._paged_display.SetActivePage('StatsOff', expires=self._display_ms)
+
+
+    def ProfileRefresh(self, status) :
+        self._paged_display.SetPageLines('Profile',
+                                        10,
+                                        line1= 'Profile',
+                                        line2= status
+                                        )
+        self._paged_display.SetActivePage('Profile', expires=self._display_ms)
+
+
     def SCREENIDRefresh(self, id) :
         self._paged_display.SetPageLines('ScreenID',
                                         10,
@@ -419,3 +447,15 @@ class NavigationMode:
                                         line2= str(id)
                                         )
         self._paged_display.SetActivePage('ScreenID', expires=self._display_ms)
+
+
+
+def _no_refresh(*args, **kwargs):
+    pass
+
+
+class SilentNavigationMode:
+    # Stands in for NavigationMode while the screen refreshes are shed: every refresh does nothing
+
+    def __getattr__(self, name):
+        return _no_refresh
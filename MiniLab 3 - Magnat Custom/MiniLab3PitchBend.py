@@ -0,0 +1,108 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import time
+import channels
+import plugins
+import device
+
+import ArturiaVCOL
+
+
+# This class sends the pitch wheel to the selected channel.
+# The wheel is the densest stream the controller sends, so:
+# - where the bend goes (channel pitch, Analog Lab or nowhere) is worked out once per selected
+#   channel and kept until the next OnRefresh, instead of asking FL on every message,
+# - a value equal to the last one sent is dropped,
+# - FL is updated at most PITCH_BEND_MAX_RATE_HZ times per second. The values in between are
+#   held back and the newest one is sent by the next message or OnIdle, so the wheel always
+#   ends on its resting value.
+
+
+## CONSTANT
+
+PORT_MIDICC_ANALOGLAB = 10
+
+# Highest number of pitch updates per second sent to FL, 0 for no limit
+PITCH_BEND_MAX_RATE_HZ = 100
+
+# Routing of the bend
+ROUTE_NONE = 0          # No channel selected or no plugin
+ROUTE_CHANNEL = 1       # Channel pitch
+ROUTE_ANALOGLAB = 2     # Forwarded to Analog Lab
+
+
+class MiniLabPitchBend:
+
+    def __init__(self, max_rate_hz=PITCH_BEND_MAX_RATE_HZ):
+        self._interval = 1 / max_rate_hz if max_rate_hz else 0
+        self._route = None
+        self._channel = -1
+        self._last_sent = None
+        self._last_time = -1.0
+        # (status, data1, data2) held back by the rate limit
+        self._pending = None
+
+    def Invalidate(self):
+        # Forgets the routing, called when FL reports a change (selection, plugin...).
+        # A value held back still goes to the channel it was meant for, it may be the resting one.
+        if self._pending is not None:
+            self._send(self._pending, time.perf_counter())
+        self._route = None
+
+    def _update_route(self):
+        channel = channels.selectedChannel()
+        if channel != self._channel:
+            # The last value sent was for another channel
+            self._last_sent = None
+        self._channel = channel
+        if channels.selectedChannel(1) == -1 or not plugins.isValid(self._channel):
+            self._route = ROUTE_NONE
+        elif plugins.getPluginName(self._channel) in ArturiaVCOL.V_COL:
+            self._route = ROUTE_ANALOGLAB
+        else:
+            self._route = ROUTE_CHANNEL
+
+    def Process(self, event):
+        # Returns True when the bend was taken, sent now or later
+        if self._route is None:
+            self._update_route()
+        if self._route == ROUTE_NONE:
+            return False
+
+        value = (event.status, event.data1, event.data2)
+        if value == self._last_sent:
+            self._pending = None
+            return True
+
+        now = time.perf_counter()
+        if now - self._last_time < self._interval:
+            self._pending = value
+            return True
+
+        self._send(value, now)
+        return True
+
+    def Idle(self):
+        # Sends the value held back by the rate limit
+        if self._pending is not None:
+            now = time.perf_counter()
+            if now - self._last_time >= self._interval:
+                self._send(self._pending, now)
+
+    def _send(self, value, now):
+        status, data1, data2 = value
+        if self._route == ROUTE_CHANNEL:
+            channels.setChannelPitch(self._channel, (data2-64)*(200/64), 1)
+        else:
+            device.forwardMIDICC(status + (data1 << 8) + (data2 << 16) + (PORT_MIDICC_ANALOGLAB << 24))
+        self._last_sent = value
+        self._last_time = now
+        self._pending = None
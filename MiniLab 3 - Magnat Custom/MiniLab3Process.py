@@ -8,6 +8,7 @@
 ]]
 """
 
+import time
 import channels
 import mixer
 import patterns
@@ -20,11 +21,21 @@ import general
 import MiniLab3Plugin
 
 
-from MiniLab3Dispatch import MidiEventDispatcher
-from MiniLab3Dispatch import send_to_device
+from MiniLab3Dispatch import MidiEventDispatcher, CompiledMidiEventDispatcher, SysexDispatcher
+from MiniLab3Dispatch import by_midi_id, by_control_num, by_velocity, by_status
+from MiniLab3Dispatch import ignore_release, ignore_press
+from MiniLab3Dispatch import send_to_device, send_frame
+from MiniLab3Dispatch import TimeHandler
+from MiniLab3Codec import pad_color
+from MiniLab3Event import MiniLabEvent
 from MiniLab3Display import MiniLabDisplay
 from MiniLab3Pages import MiniLabPagedDisplay
-from MiniLab3Navigation import NavigationMode
+from MiniLab3Navigation import NavigationMode, SilentNavigationMode
+from MiniLab3Stats import MiniLabStats
+from MiniLab3Coalescer import MiniLabCoalescer
+from MiniLab3Scrub import MiniLabScrubber
+from MiniLab3Profiler import MiniLabProfiler
+import MiniLab3Profiler
 from MiniLab3Plugin import KNOB_HW_VALUE
 import ArturiaVCOL
 
@@ -134,6 +145,40 @@ KNOB_HW_ID = [
 # UPDATE KNOBS
 UPDATE_KNOB = 0
 
+# Drum pads channel, pressed and released
+DRUM_STATUS = (153, 137)
+NOTE_STATUS = [status for status in range(0x80, 0xA0) if status not in DRUM_STATUS]
+
+# Memory (program) the controller reports being on, 0 until it answers
+ARTURIA_MEMORY = 1
+DAW_MEMORY = 2
+MEMORY = 0
+
+# Knobs and faders: only the newest value per control and target is applied, once per OnIdle
+# or after COALESCE_MAX_DELAY_S seconds at most
+COALESCE_CONTROLS = True
+COALESCE_MAX_DELAY_S = 0.05
+
+# Main encoder acceleration in the browser and the channel rack: each event moves by the
+# encoder magnitude (1 to 8), multiplied during a fast spin. Menus always move by one item. The hint and the mixer track
+# follow once the encoder rests for ENCODER_SETTLE_S.
+ENCODER_ACCELERATION = True
+# Events closer than this belong to the same spin
+ENCODER_SPIN_S = 0.05
+# The multiplier grows by one every ENCODER_RAMP_EVENTS events of a spin, up to ENCODER_MAX_FACTOR
+ENCODER_RAMP_EVENTS = 4
+ENCODER_MAX_FACTOR = 4
+# Steps of a single event at most, whatever the magnitude and the multiplier
+ENCODER_MAX_STEPS = 16
+ENCODER_SETTLE_S = 0.08
+
+# Rewind and FastForward add up their moves and set the song position once per OnIdle,
+# moving faster the longer they are used (see MiniLab3Scrub.py)
+SCRUB_COALESCE = True
+
+# Dispatch through one flat table built from the dispatchers below instead of walking them
+COMPILED_DISPATCH = True
+
 class MiniLabMidiProcessor:
     @staticmethod
     def _is_pressed(event):
@@ -142,6 +187,22 @@ class MiniLabMidiProcessor:
     def __init__(self, mk3):
         
         self.shift = False
+        self.stopHeld = False
+        # A Shift + Stop chord was played while Stop was held
+        self.stopChordUsed = False
+        # Stop was pressed under shift, the song is stopped on its release whatever the layer then
+        self.stopOnRelease = False
+        # Record was pressed for a Shift + Stop + Record chord, its release is dropped
+        self.recordChordUsed = False
+
+        # Diagnostics page, None when hidden
+        self._stats = None
+
+        # Profile capture in progress, None most of the time
+        self._profiler = None
+
+        # Knob and fader values waiting for the next idle tick, None to apply them right away
+        self._coalescer = MiniLabCoalescer(COALESCE_MAX_DELAY_S) if COALESCE_CONTROLS else None
         
         # Snap to scale
         self.keyScaler = KeyScaler()
@@ -149,32 +210,13 @@ class MiniLabMidiProcessor:
         self.snapToScaleJustEdited = False
         self.snapToScaleUnderPressure = False
         
-        def by_midi_id(event) : return event.midiId
-        def by_control_num(event) : return event.controlNum
-        def by_velocity(event) : return event.data2
-        def by_status(event) : return event.status
-        def by_sysex(event) : return event.sysex
-        def ignore_release(event): return self._is_pressed(event)
-        def ignore_press(event): return not self._is_pressed(event)
-        def is_drum(event): return event.status in [153, 137]
-
         self._mk3 = mk3
 
-        # Main event, will then dispatch to other Dispatcher
-        self._midi_id_dispatcher = (
-            MidiEventDispatcher(by_midi_id)
-            .NewHandler(176, self.OnCommandEvent)
-            .NewHandler(224, self.OnWheelEvent)
-            
-            # Drum event
-            .NewHandler(144, self.onMidiEvent) # Pressed
-            .NewHandler(128, self.onMidiEvent) # Released
-            )
-        
+        # Sysex replies of the controller, by payload prefix
         self._sysex_dispatcher = (
-            MidiEventDispatcher(by_sysex)
-            .NewHandler(b'\xf0\x00 k\x7fB\x02\x00@b\x01\xf7', self.ArturiaMemory, ignore_release)
-            .NewHandler(b'\xf0\x00 k\x7fB\x02\x00@b\x02\xf7', self.DAWMemory, ignore_release)
+            SysexDispatcher()
+            .NewHandler(bytes([0x02, 0x00, 0x40, 0x62, 0x01]), self.ArturiaMemory)
+            .NewHandler(bytes([0x02, 0x00, 0x40, 0x62, 0x02]), self.DAWMemory)
             )
         
         # Drum pad
@@ -190,6 +232,17 @@ class MiniLabMidiProcessor:
             .NewHandler(43, self.Undo) # Drum  8 (Tap)
         )
 
+        self._knob_dispatcher = (
+            MidiEventDispatcher(by_velocity)
+            .NewHandlerForKeys(range(65,73), self.Navigator)
+            .NewHandlerForKeys(range(55,63), self.Navigator)
+        )
+        
+        # MAPPING WHEEL
+        self._wheel_dispatcher = (
+            MidiEventDispatcher(by_status)
+        )
+        
         self._midi_command_dispatcher = (
             MidiEventDispatcher(by_control_num)
             
@@ -204,7 +257,7 @@ class MiniLabMidiProcessor:
             .NewHandler(103, self.Rewind)
             .NewHandler(104, self.FastForward)
             .NewHandler(118, self.SwitchWindow, ignore_release)
-            .NewHandler(28, self.OnKnobEvent)
+            .NewHandler(28, self._knob_dispatcher.Dispatch)
             .NewHandler(29, self.PluginTest)
             #.NewHandler(29, self.AllLEDs, ignore_release)
             .NewHandler(119, self.ToggleBrowserChannelRack, ignore_release)
@@ -224,31 +277,138 @@ class MiniLabMidiProcessor:
             
         )
         
-        self._knob_dispatcher = (
-            MidiEventDispatcher(by_velocity)
-            .NewHandlerForKeys(range(65,73), self.Navigator)
-            .NewHandlerForKeys(range(55,63), self.Navigator)
-        )
-        
-        # MAPPING WHEEL
-        self._wheel_dispatcher = (
+        # Main event, will then dispatch to other Dispatcher
+        self._note_dispatcher = (
             MidiEventDispatcher(by_status)
+            .NewHandlerForKeys(DRUM_STATUS, self._midi_drum_pad_dispatcher.Dispatch)
+            .NewHandlerForKeys(NOTE_STATUS, self.onMidiEvent)
+        )
+
+        self._midi_id_dispatcher = (
+            MidiEventDispatcher(by_midi_id)
+            .NewHandler(176, self._midi_command_dispatcher.Dispatch)
+            .NewHandler(224, self._wheel_dispatcher.Dispatch)
+            
+            # Drum event
+            .NewHandler(144, self._note_dispatcher.Dispatch) # Pressed
+            .NewHandler(128, self._note_dispatcher.Dispatch) # Released
+            )
+
+        # SHIFT LAYER
+        # Same mapping, with the handlers that only exist while shift is held
+        self._shift_command_dispatcher = (
+            self._midi_command_dispatcher.Copy()
+            .NewHandler(106, self.ShiftStop)
+            .NewHandler(108, self.ShiftRecord)
+            .NewHandler(109, self.ShiftRedo)
         )
+
+        self._shift_midi_id_dispatcher = (
+            self._midi_id_dispatcher.Copy()
+            .NewHandler(176, self._shift_command_dispatcher.Dispatch)
+        )
+
+        self._compiled_dispatcher = CompiledMidiEventDispatcher(self._midi_id_dispatcher)
+        self._compiled_shift_dispatcher = CompiledMidiEventDispatcher(self._shift_midi_id_dispatcher)
+        if COMPILED_DISPATCH:
+            self._layers = (self._compiled_dispatcher, self._compiled_shift_dispatcher)
+        else:
+            self._layers = (self._midi_id_dispatcher, self._shift_midi_id_dispatcher)
+
+        # Active layer, swapped by ShiftOn
+        self._dispatcher = self._layers[0]
         
         #~NAVIGATION
-        self._navigation = NavigationMode(self._mk3.paged_display())
+        self._full_navigation = NavigationMode(self._mk3.paged_display())
+        self._navigation = self._full_navigation
+
+        # True while the watchdog sheds the screen and LED refreshes
+        self.shedding = False
+
+        # Encoder spin: time of the last event, events in the spin so far and the
+        # follow-up (hint, mixer track) waiting for the encoder to rest
+        self._spin_time = 0.0
+        self._spin_events = 0
+        self._spin_settle = None
+
+        # Song position moves waiting for the next idle tick
+        self._scrubber = MiniLabScrubber(self._scrub_refresh) if SCRUB_COALESCE else None
 
 
     # DISPATCH
     def ProcessEvent(self, event) :
         # print("DEBUG PRINT: ", "MidiId: ", event.midiId, "controlNum: ", event.controlNum, "data1: ", event.data1, "data2: ", event.data2, "status: ", event.status, "sysex: ", event.sysex, "controlVal: ", event.controlVal)
-        return self._midi_id_dispatcher.Dispatch(event)
+        stats = self._stats
+        if stats is None:
+            snapshot = MiniLabEvent(event)
+            handled = self._dispatcher.Dispatch(snapshot)
+            snapshot.WriteBack(event)
+            return handled
+
+        start = time.perf_counter()
+        snapshot = MiniLabEvent(event)
+        handled = self._dispatcher.Dispatch(snapshot)
+        snapshot.WriteBack(event)
+        stats.AddEvent(time.perf_counter() - start)
+        return handled
+
+    def ProcessSysex(self, event):
+        return self._sysex_dispatcher.Dispatch(event.sysex)
+
+    def Idle(self):
+        # Called from OnIdle, applies the knob and fader values held back since the last tick
+        if self._coalescer is not None:
+            if self._stats is None:
+                self._coalescer.Flush()
+            else:
+                start = time.perf_counter()
+                self._coalescer.Flush()
+                self._stats.AddWork(time.perf_counter() - start)
+
+        # Refreshes the diagnostics page at most once per STATS_INTERVAL_S
+        if self._stats is not None:
+            figures = self._stats.Update()
+            if figures is not None:
+                self._navigation.StatsRefresh(*figures)
+
+        if self._scrubber is not None:
+            self._scrubber.Idle()
+
+        if self._spin_settle is not None and time.perf_counter() - self._spin_time >= ENCODER_SETTLE_S:
+            settle = self._spin_settle
+            self._spin_settle = None
+            settle()
+
+        if self._profiler is not None and self._profiler.IsOver():
+            path = self._profiler.Stop()
+            self._profiler = None
+            print('Profile saved to', path)
+            self._navigation.ProfileRefresh('Saved')
+
+    def StartProfiler(self):
+        if self._profiler is not None or not MiniLab3Profiler.IsAvailable():
+            return
+        self._profiler = MiniLabProfiler()
+        self._navigation.ProfileRefresh('%ds capture' % MiniLab3Profiler.PROFILE_DURATION_S)
+
+    def SetShedding(self, shedding):
+        # Under load the screen refreshes are dropped, the actions themselves still run
+        self.shedding = shedding
+        if shedding:
+            self._navigation = SilentNavigationMode()
+        else:
+            self._navigation = self._full_navigation
 
-    def onMidiEvent(self, event):
-        # On drum event
-        if event.status in [153, 137]:
-            return self._midi_drum_pad_dispatcher.Dispatch(event)
+    def ToggleStats(self):
+        if self._stats is None:
+            self._stats = MiniLabStats()
+            self._navigation.StatsRefresh(0, 0, 0)
+        else:
+            self._stats = None
+            self._navigation.StatsOff()
 
+    def onMidiEvent(self, event):
+        # On note event, the drum pads have their own dispatcher
         if self.snapToScaleUnderPressure:
             newNote = self.keyScaler.getEventNote(event)
             self.keyScaler.setRootNote(newNote)
@@ -260,15 +420,6 @@ class MiniLabMidiProcessor:
 
         return False
 
-    def OnCommandEvent(self, event):
-        return self._midi_command_dispatcher.Dispatch(event)
-
-    def OnWheelEvent(self, event):
-        return self._wheel_dispatcher.Dispatch(event)
-
-    def OnKnobEvent(self, event):
-        return self._knob_dispatcher.Dispatch(event)
-
     # def OnDrumEvent(self, event) :
     #     index = event.data1
     #     if event.status == 153 :
@@ -347,7 +498,41 @@ class MiniLabMidiProcessor:
             
             
 
+    def _encoder_steps(self, event):
+        # Steps of an encoder event: its magnitude, multiplied during a fast spin
+        if not ENCODER_ACCELERATION:
+            return 1
+        if event.data2 >= 65 :
+            magnitude = event.data2 - 64
+        else :
+            magnitude = 63 - event.data2
+
+        now = time.perf_counter()
+        if now - self._spin_time < ENCODER_SPIN_S:
+            self._spin_events += 1
+        else:
+            self._spin_events = 0
+        self._spin_time = now
+
+        factor = min(1 + self._spin_events // ENCODER_RAMP_EVENTS, ENCODER_MAX_FACTOR)
+        return min(magnitude * factor, ENCODER_MAX_STEPS)
+
+    def _settle(self, follow_up):
+        # Runs follow_up once the encoder rests, right away without acceleration
+        if ENCODER_ACCELERATION:
+            self._spin_settle = follow_up
+        else:
+            follow_up()
+
+    def _browser_hint(self):
+        self._navigation.HintRefresh(ui.getFocusedNodeCaption())
+
+    def _channel_mixer_track(self):
+        mixer.setTrackNumber(channels.getTargetFxTrack(channels.selectedChannel()),3)
+
     def Navigator(self, event):
+        steps = self._encoder_steps(event)
+
         if event.data2 in range(65,73) :
             event.data2 = 65
         elif event.data2 in range(55,63) :
@@ -367,29 +552,29 @@ class MiniLabMidiProcessor:
             self._hideAll(event)         
         elif ui.getFocused(WidBrowser) :
             if not ui.isInPopupMenu() :  
-                if event.data2 == 62 :
-                    ui.previous()
-                elif event.data2 == 65 :
-                    ui.next()
-                self._navigation.HintRefresh(ui.getFocusedNodeCaption())
+                for _ in range(steps) :
+                    if event.data2 == 62 :
+                        ui.previous()
+                    elif event.data2 == 65 :
+                        ui.next()
             else :
+                # One item per event in the menus, they are short and wrap around
                 if event.data2 == 62 :
                     ui.up()
                 elif event.data2 == 65 :
                     ui.down()
-                self._navigation.HintRefresh(ui.getFocusedNodeCaption())
+            self._settle(self._browser_hint)
         elif ui.getFocused(WidChannelRack) :
-            self._show_and_focus(WidChannelRack)
-            if event.data2 == 62 :
-                self._show_and_focus(WidChannelRack)
-                self._hideAll(event)
-                ui.previous()
-                mixer.setTrackNumber(channels.getTargetFxTrack(channels.selectedChannel()),3)
-            elif event.data2 == 65 :  
+            # Editors are closed once per spin, the mixer track follows when it stops
+            if self._spin_settle != self._channel_mixer_track :
                 self._show_and_focus(WidChannelRack)
                 self._hideAll(event)
-                ui.next()
-                mixer.setTrackNumber(channels.getTargetFxTrack(channels.selectedChannel()),3)
+            for _ in range(steps) :
+                if event.data2 == 62 :
+                    ui.previous()
+                elif event.data2 == 65 :
+                    ui.next()
+            self._settle(self._channel_mixer_track)
         else :
             ui.setFocused(WidChannelRack)
         
@@ -416,6 +601,14 @@ class MiniLabMidiProcessor:
 
 
     # FUNCTIONS
+    def ShiftRedo(self, event):
+        # Shift + Stop + Tap toggles the diagnostics page
+        if self.stopHeld and self._is_pressed(event):
+            self.stopChordUsed = True
+            self.ToggleStats()
+            return True
+        return self.Redo(event)
+
     def Redo(self, event):
         isPressed = self._is_pressed(event)
         if isPressed:
@@ -435,7 +628,22 @@ class MiniLabMidiProcessor:
         return True
         
 
+    def ShiftRecord(self, event) :
+        # Shift + Stop + Record starts a profile capture. The chord is checked on press, Stop may
+        # be released before Record. Otherwise Record acts on release, as it does without the chord.
+        if self._is_pressed(event):
+            if self.stopHeld:
+                self.stopChordUsed = True
+                self.recordChordUsed = True
+                self.StartProfiler()
+            return True
+        return self.Record(event)
+
     def Record(self, event) :
+        if self.recordChordUsed and not self._is_pressed(event):
+            # Release of the Record of a chord, whatever the layer then
+            self.recordChordUsed = False
+            return True
         transport.record()
         #self._navigation.RecordRefresh()
         return True
@@ -475,11 +683,32 @@ class MiniLabMidiProcessor:
         self._mk3.LightReturn().updateSnapToScale(self.shift, self.snapToScale)
         return True
 
+    def ShiftStop(self, event):
+        # Under shift, Stop is also the modifier of the diagnostics chords: the song is only
+        # stopped on release, when no chord was played while Stop was held
+        if self._is_pressed(event):
+            self.stopHeld = True
+            self.stopChordUsed = False
+            self.stopOnRelease = True
+            self._mk3.LightReturn().updateStop(True)
+            return True
+
+        self.stopHeld = False
+        self.stopOnRelease = False
+        if not self.stopChordUsed:
+            transport.stop()
+        self._mk3.LightReturn().updateStop(False)
+        return True
+
     def Stop(self, event):
         isPressed = self._is_pressed(event)
+        if not isPressed and self.stopOnRelease:
+            # Shift was let go before Stop
+            return self.ShiftStop(event)
+        self.stopHeld = isPressed
         if isPressed:
             transport.stop()
-            send_to_device(bytes([0x02, 0x02, 0x16, 0x08, 0x7F, 0x7F, 0x7F]))
+            send_frame(pad_color(0x08, [0x7F, 0x7F, 0x7F]))
             # self._navigation.StopRefresh()
         
         self._mk3.LightReturn().updateStop(isPressed)
@@ -506,6 +735,9 @@ class MiniLabMidiProcessor:
         
    
     def FastForward(self, event) :
+        if self._scrubber is not None:
+            self._scrubber.Move(True)
+            return True
         pos = transport.getSongPos(2)
         transport.setSongPos(pos+24,2)
         self._navigation.FastForwardRefresh()
@@ -513,11 +745,20 @@ class MiniLabMidiProcessor:
 
     
     def Rewind(self, event) :
+        if self._scrubber is not None:
+            self._scrubber.Move(False)
+            return True
         pos = transport.getSongPos(2)
         transport.setSongPos(pos-24,2)
         self._navigation.RewindRefresh()
         return True
 
+    def _scrub_refresh(self, forward):
+        if forward:
+            self._navigation.FastForwardRefresh()
+        else:
+            self._navigation.RewindRefresh()
+
 
     def SetClick(self, event) :
         transport.globalTransport(midi.FPT_Metronome,1)
@@ -541,24 +782,41 @@ class MiniLabMidiProcessor:
         #     send_to_device(bytes([0x02, 0x02, 0x16, 0x5B, 0x14, 0x14, 0x14]))
         #     send_to_device(bytes([0x02, 0x01, 0x16, 0x5B, 0x14, 0x14, 0x14]))
 
+    def _defer(self, key, name, apply_fn, event):
+        # Continuous controls go through the coalescer when there is one.
+        # key starts with the kind of target ('mixer' track or 'plugin' channel), the numbers overlap.
+        # The handler only times the queuing then, apply_fn is timed under name when it runs.
+        if self._coalescer is None:
+            apply_fn(event)
+        else:
+            self._coalescer.Defer(key, TimeHandler(apply_fn, name), event)
+
     def SetVolumeTrack(self, event) :
         if not ui.getFocused(WidPlugin) : 
-            value = event.data2/127
-            mixer.setTrackVolume(mixer.trackNumber(),value, 2)
-            self._navigation.VolumeChRefresh(value, 4)
+            track = mixer.trackNumber()
+            self._defer(('mixer', event.data1, track), '_apply_volume', lambda event: self._apply_volume(track, event), event)
         else :
             self.Plugin(event)
         return True
+
+    def _apply_volume(self, track, event):
+        value = event.data2/127
+        mixer.setTrackVolume(track,value, 2)
+        self._navigation.VolumeChRefresh(value, 4)
             
    
     def SetPanTrack(self, event) :
         if not ui.getFocused(WidPlugin) :
-            value = round(event.data2*(128/127)-64)/64
-            mixer.setTrackPan(mixer.trackNumber(),value, 2)
-            self._navigation.PanChRefresh(value, 3)
+            track = mixer.trackNumber()
+            self._defer(('mixer', event.data1, track), '_apply_pan', lambda event: self._apply_pan(track, event), event)
         else :
             self.Plugin(event)
         return True
+
+    def _apply_pan(self, track, event):
+        value = round(event.data2*(128/127)-64)/64
+        mixer.setTrackPan(track,value, 2)
+        self._navigation.PanChRefresh(value, 3)
             
 
     def AnalogLabPreset(self, event) :
@@ -575,20 +833,12 @@ class MiniLabMidiProcessor:
         
         if event.data1 != 29 :
             if ui.getFocused(WidPlugin) :
-                global DISPLAY_TYPE
                 if event.status != 224 :
                     clef = event.data1
                 else :
                     clef = 224
-                    
-                parameter, value, mapped = MiniLab3Plugin.Plugin(event, clef)
-
-                if event.data1 in KNOB_ID :
-                    self._navigation.PluginRefresh(parameter, value, mapped, event.data2, 3)
-                    DISPLAY_TYPE = 3
-                elif event.data1 != 1 :
-                    self._navigation.PluginRefresh(parameter, value, mapped, event.data2, 4)
-                    DISPLAY_TYPE = 4
+                
+                self._defer(('plugin', clef, channels.selectedChannel()), '_apply_plugin', lambda event: self._apply_plugin(clef, event), event)
             else :
                 self._navigation.NoPlugin()
         else :
@@ -599,6 +849,17 @@ class MiniLabMidiProcessor:
         
         return True
 
+    def _apply_plugin(self, clef, event):
+        global DISPLAY_TYPE
+        parameter, value, mapped = MiniLab3Plugin.Plugin(event, clef)
+
+        if event.data1 in KNOB_ID :
+            self._navigation.PluginRefresh(parameter, value, mapped, event.data2, 3)
+            DISPLAY_TYPE = 3
+        elif event.data1 != 1 :
+            self._navigation.PluginRefresh(parameter, value, mapped, event.data2, 4)
+            DISPLAY_TYPE = 4
+
     def PluginPreset(self, event) :
         if event.data2 in range(65,73) :
             if channels.selectedChannel(1) != -1 :
@@ -635,7 +896,9 @@ class MiniLabMidiProcessor:
 
     def ShiftOn(self, event) :
         self.shift = self.ShiftIsPressed(event)
-        self._mk3.LightReturn().updateAll(self.shift, self.snapToScale)
+        self._dispatcher = self._layers[self.shift]
+        if not self.shift and not self.shedding:
+            self._mk3.LightReturn().ShiftReleased(self.snapToScale)
         return True
 
     def PadOn(self, index) :
@@ -656,9 +919,9 @@ class MiniLabMidiProcessor:
         print("PAD REFRESHING")
         for i in range(16) :
             if PAD_MATRIX_STATE[i] :
-                send_to_device(bytes([0x02, 0x02, 0x16, PAD_MATRIX[i], 0x58, 0x58, 0x58, 0x7F]))
+                send_frame(pad_color(PAD_MATRIX[i], [0x58, 0x58, 0x58, 0x7F]))
             else :
-                send_to_device(bytes([0x02, 0x02, 0x16, PAD_MATRIX[i], 0x14, 0x14, 0x14, 0x7F]))
+                send_frame(pad_color(PAD_MATRIX[i], [0x14, 0x14, 0x14, 0x7F]))
                 
 
         
@@ -673,14 +936,18 @@ class MiniLabMidiProcessor:
                 #print(value)
                 send_to_device(bytes([0x21, 0x10, 0x40, KNOB_HW_ID[i], 0x00, value]))
 
-    def DAWMemory(self) :
+    def DAWMemory(self, payload) :
         global MEMORY
         #print("MEMORY = ",MEMORY)
-        MEMORY = 2
+        if MEMORY != DAW_MEMORY and not self.shedding:
+            # Back from the Arturia program, the pads and screen show its state
+            self._mk3.LightReturn().updateAll(self.shift, self.snapToScale)
+            self._mk3.Sync()
+        MEMORY = DAW_MEMORY
         return True
         
-    def ArturiaMemory(self) :
+    def ArturiaMemory(self, payload) :
         global MEMORY
         #print("MEMORY = ",MEMORY)
-        MEMORY = 1
+        MEMORY = ARTURIA_MEMORY
         return True
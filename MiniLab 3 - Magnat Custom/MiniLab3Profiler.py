@@ -0,0 +1,53 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import os
+import time
+
+try:
+    import cProfile
+except ImportError:
+    cProfile = None
+
+
+# This class captures a cProfile of the script for a few seconds, on demand from the
+# controller, and saves it next to the script for an offline review with pstats:
+#
+#   python -m pstats "profile_20221231_235959.prof"
+#
+# Nothing runs while no capture is in progress.
+
+
+## CONSTANT
+
+PROFILE_DURATION_S = 10
+PROFILE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class MiniLabProfiler:
+
+    def __init__(self):
+        self.path = os.path.join(PROFILE_DIR, time.strftime('profile_%Y%m%d_%H%M%S.prof'))
+        self._end_time = time.monotonic() + PROFILE_DURATION_S
+        self._profile = cProfile.Profile()
+        # Profiles every callback FL calls from now on, until Stop
+        self._profile.enable()
+
+    def IsOver(self):
+        return time.monotonic() >= self._end_time
+
+    def Stop(self):
+        self._profile.disable()
+        self._profile.dump_stats(self.path)
+        return self.path
+
+
+def IsAvailable():
+    return cProfile is not None
@@ -0,0 +1,160 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import sys
+import time
+import struct
+from array import array
+
+
+# This class records every FL callback of the script into a compact binary log
+# that tools/replay.py can feed back to the script outside of FL Studio.
+#
+# The file is a list of chunks. Each chunk is a header (magic, version, record count)
+# followed by one array per field, in the RECORD_FIELDS order, then the payloads of the
+# chunk one after the other: payload_len bytes per record, the whole sysex for OnSysEx.
+
+
+## CONSTANT
+
+# Callback kinds
+REC_MIDI_MSG = 1
+REC_PITCH_BEND = 2
+REC_REFRESH = 3
+REC_IDLE = 4
+REC_BEAT = 5
+REC_SYSEX = 6
+
+CALLBACK_NAMES = {
+    REC_MIDI_MSG : 'OnMidiMsg',
+    REC_PITCH_BEND : 'OnPitchBend',
+    REC_REFRESH : 'OnRefresh',
+    REC_IDLE : 'OnIdle',
+    REC_BEAT : 'OnUpdateBeatIndicator',
+    REC_SYSEX : 'OnSysEx',
+}
+
+# (field name, array typecode)
+RECORD_FIELDS = (
+    ('time', 'd'),
+    ('kind', 'B'),
+    ('midiId', 'B'),
+    ('status', 'B'),
+    ('data1', 'B'),
+    ('data2', 'B'),
+    ('flags', 'I'),
+    ('payload_len', 'I'),
+)
+
+CHUNK_HEADER = struct.Struct('<4sHI')
+MAGIC = b'ML3R'
+VERSION = 2
+
+# Records kept in memory before they are written to the file
+CHUNK_SIZE = 4096
+
+
+def _new_arrays():
+    return [array(typecode) for _, typecode in RECORD_FIELDS]
+
+
+class MiniLabRecorder:
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self._path = path
+        self._chunk_size = chunk_size
+        self._start = time.perf_counter()
+        self._count = 0
+        self._arrays = _new_arrays()
+        (self._time, self._kind, self._midi_id, self._status,
+            self._data1, self._data2, self._flags, self._payload_len) = self._arrays
+        self._payload = bytearray()
+        # Start a new file
+        open(self._path, 'wb').close()
+
+    def RecordEvent(self, kind, event):
+        self._append(kind, event.midiId, event.status, event.data1, event.data2, 0)
+
+    def RecordCall(self, kind, flags=0):
+        self._append(kind, 0, 0, 0, 0, flags)
+
+    def RecordSysex(self, event):
+        self._append(REC_SYSEX, 0, 0xF0, 0, 0, 0, event.sysex)
+
+    def _append(self, kind, midi_id, status, data1, data2, flags, payload=b''):
+        self._time.append(time.perf_counter() - self._start)
+        self._kind.append(kind)
+        self._midi_id.append(midi_id & 0xFF)
+        self._status.append(status & 0xFF)
+        self._data1.append(data1 & 0xFF)
+        self._data2.append(data2 & 0xFF)
+        self._flags.append(flags & 0xFFFFFFFF)
+        self._payload_len.append(len(payload))
+        self._payload += payload
+        self._count += 1
+        if self._count >= self._chunk_size:
+            self.Flush()
+
+    def Flush(self):
+        # Append the records kept in memory to the file
+        if self._count == 0:
+            return
+        with open(self._path, 'ab') as f:
+            f.write(CHUNK_HEADER.pack(MAGIC, VERSION, self._count))
+            for values in self._arrays:
+                if sys.byteorder == 'big':
+                    values.byteswap()
+                values.tofile(f)
+            f.write(self._payload)
+        for values in self._arrays:
+            del values[:]
+        del self._payload[:]
+        self._count = 0
+
+
+def ReadSession(path):
+    # Returns a dict field name -> array with every record of the file,
+    # and 'payload' -> the payloads of every record, payload_len bytes each
+    session = dict(zip([name for name, _ in RECORD_FIELDS], _new_arrays()))
+    session['payload'] = bytearray()
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(CHUNK_HEADER.size)
+            if not header:
+                break
+            if len(header) < CHUNK_HEADER.size:
+                raise ValueError('Truncated chunk header in %s' % path)
+            magic, version, count = CHUNK_HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError('%s is not a MiniLab 3 session (version %d)' % (path, VERSION))
+            for name, typecode in RECORD_FIELDS:
+                values = array(typecode)
+                values.fromfile(f, count)
+                if sys.byteorder == 'big':
+                    values.byteswap()
+                session[name].extend(values)
+            payload_lengths = session['payload_len']
+            payload_size = sum(payload_lengths[len(payload_lengths) - count:])
+            sysex = f.read(payload_size)
+            if len(sysex) < payload_size:
+                raise ValueError('Truncated sysex payloads in %s' % path)
+            session['payload'] += sysex
+    return session
+
+
+def SysexPayloads(session):
+    # The sysex of each OnSysEx record of a session read by ReadSession, None for the other callbacks
+    payloads = []
+    sysex = session['payload']
+    offset = 0
+    for kind, size in zip(session['kind'], session['payload_len']):
+        payloads.append(bytes(sysex[offset:offset + size]) if kind == REC_SYSEX else None)
+        offset += size
+    return payloads
@@ -14,7 +14,8 @@ import time
 import transport
 import mixer
 import channels
-from MiniLab3Dispatch import send_to_device 
+from MiniLab3Dispatch import send_to_device, send_frame, FlushOutput
+from MiniLab3Codec import pad_color, all_pads
 
 
 
@@ -79,20 +80,57 @@ ON_RECORD_OFF_COLOR = [0x14, 0x00, 0x00]
 
 ON_STOP_COLOR = [0x14, 0x14, 0x14]
 
+PAD_OFF_COLOR = [0x14, 0x14, 0x14]
+
 class MiniLabLightReturn:
 
+    def __init__(self):
+        # Current color of every pad (r, g, b of each), kept up to date by each LED sent.
+        # Releasing shift pushes them in one frame, with no query to FL.
+        self._pad_colors = bytearray(PAD_OFF_COLOR * len(PAD_MAP))
+        # True when FL reported a change while shift was held, the frame must be computed again
+        self._stale = False
+
+    def _send_pad(self, pad, color):
+        self._set_pad(pad, color)
+        send_frame(pad_color(pad, color))
+
+    def _set_pad(self, pad, color):
+        # Same as _send_pad without sending, for the shift release frame
+        offset = 3 * (pad - PAD_MAP[0])
+        self._pad_colors[offset:offset + 3] = bytes(color)
+
+    def ShiftReleased(self, isSnapToScale):
+        # The controller draws its own shift layer, put the script pads back in one frame
+        if self._stale:
+            self._stale = False
+            self._set_pad(0x04, self._snap_to_scale_color(isSnapToScale))
+            self._set_pad(0x07, self._loop_color())
+            self._set_pad(0x09, self._play_color())
+            self._set_pad(0x0A, self._record_color())
+            self._set_pad(0x06, self._step_color())
+            self._set_pad(0x05, self._wait_for_input_color())
+        send_frame(all_pads(self._pad_colors))
+
     def init(self):
         self.isWaitingForInput = False
 
-        send_to_device(bytes([0x04, 0x02, 0x16, 0x00, 0x7F, 0x00, 0x00, 0x7F, 0x00, 0x00, 0x7F, 0x00, 0x00, 0x7F, 0x00, 0x00, 0x7F, 0x00, 0x00, 0x7F, 0x00, 0x00, 0x7F, 0x00, 0x00, 0x7F, 0x00, 0x00]))
+        send_frame(all_pads([0x7F, 0x00, 0x00] * len(PAD_MAP)))
+        FlushOutput()
         time.sleep(0.2)
-        send_to_device(bytes([0x04, 0x02, 0x16, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]))
+        send_frame(all_pads([0x00, 0x00, 0x00] * len(PAD_MAP)))
+        FlushOutput()
         time.sleep(0.2)
-        send_to_device(bytes([0x04, 0x02, 0x16, 0x00, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14, 0x14]))
+        self._pad_colors = bytearray(PAD_OFF_COLOR * len(PAD_MAP))
+        send_frame(all_pads(self._pad_colors))
 
         self.updateAll(False, False)
 
     def updateAll(self, isShift, isSnapToScale):
+        if isShift:
+            # Nothing is shown under shift, the release frame will be computed again
+            self._stale = True
+            return
         self.updateSnapToScale(isShift, isSnapToScale)
 
         self.LoopReturn(isShift)
@@ -103,91 +141,91 @@ class MiniLabLightReturn:
 
     def MetronomeReturn(self) :
         if ui.isMetronomeEnabled() :
-            send_to_device(bytes([0x02, 0x02, 0x16, 0x54, 0x7F, 0x7F, 0x00]))
+            send_frame(pad_color(0x54, [0x7F, 0x7F, 0x00]))
         else :
-            send_to_device(bytes([0x02, 0x02, 0x16, 0x54, 0x14, 0x14, 0x00]))
+            send_frame(pad_color(0x54, [0x14, 0x14, 0x00]))
     
     def updateUndoRedo(self, isPressed):
         if isPressed:
-            send_to_device(bytes([0x02, 0x02, 0x16, 0x0B, 0x7F, 0x7F, 0x7F]))
+            self._send_pad(0x0B, [0x7F, 0x7F, 0x7F])
         else:
-            send_to_device(bytes([0x02, 0x02, 0x16, 0x0B, 0x14, 0x14, 0x14]))
+            self._send_pad(0x0B, [0x14, 0x14, 0x14])
+
+    def _snap_to_scale_color(self, isActivated):
+        return [0x7F, 0x7F, 0x7F] if isActivated else [0x14, 0x14, 0x14]
 
     def updateSnapToScale(self, isShift, isActivated):
         if not isShift:
-            if isActivated:
-                send_to_device(bytes([0x02, 0x02, 0x16, 0x04, 0x7F, 0x7F, 0x7F]))
-            else:
-                send_to_device(bytes([0x02, 0x02, 0x16, 0x04, 0x14, 0x14, 0x14]))
+            self._send_pad(0x04, self._snap_to_scale_color(isActivated))
+        else:
+            self._stale = True
 
     def updateStop(self, isPressed):
         if isPressed:
             self.isWaitingForInput = False
-            send_to_device(bytes([0x02, 0x02, 0x16, 0x08, 0x7F, 0x7F, 0x7F]))
+            self._send_pad(0x08, [0x7F, 0x7F, 0x7F])
         else:
-            send_to_device(bytes([0x02, 0x02, 0x16, 0x08, 0x14, 0x14, 0x14]))
+            self._send_pad(0x08, [0x14, 0x14, 0x14])
+
+    def _wait_for_input_color(self):
+        return ON_START_ON_INPUT_COLOR if ui.isStartOnInputEnabled() else ON_START_ON_INPUT_OFF_COLOR
 
     def WaitForInputReturn(self, isShift):
         if not isShift:
-            if ui.isStartOnInputEnabled():
-                send_to_device(bytes([0x02, 0x02, 0x16, 0x05, *ON_START_ON_INPUT_COLOR]))
-            else :
-                send_to_device(bytes([0x02, 0x02, 0x16, 0x05, *ON_START_ON_INPUT_OFF_COLOR]))
+            self._send_pad(0x05, self._wait_for_input_color())
+
+    def _step_color(self):
+        return ON_STEP_COLOR if ui.getStepEditMode() else ON_STEP_OFF_COLOR
 
     def StepReturn(self, isShift):
         if not isShift:
-            if ui.getStepEditMode():
-                send_to_device(bytes([0x02, 0x02, 0x16, 0x06, *ON_STEP_COLOR]))
-            else :
-                send_to_device(bytes([0x02, 0x02, 0x16, 0x06, *ON_STEP_OFF_COLOR]))
+            self._send_pad(0x06, self._step_color())
+
+    def _loop_color(self):
+        return ON_LOOP_COLOR if ui.isLoopRecEnabled() else ON_LOOP_OFF_COLOR
 
     def LoopReturn(self, isShift):
         if not isShift:
-            if ui.isLoopRecEnabled() :
-                send_to_device(bytes([0x02, 0x02, 0x16, 0x07, *ON_LOOP_COLOR]))
-            else :
-                send_to_device(bytes([0x02, 0x02, 0x16, 0x07, *ON_LOOP_OFF_COLOR]))
+            self._send_pad(0x07, self._loop_color())
+
+    def _play_color(self):
+        return ON_PLAY_COLOR if self.isWaitingForInput or mixer.getSongTickPos() != 0 else ON_PLAY_OFF_COLOR
 
     def PlayReturn(self, isShift):
         if not isShift:
-            if self.isWaitingForInput or mixer.getSongTickPos() != 0 :
-                send_to_device(bytes([0x02, 0x02, 0x16, 0x09, *ON_PLAY_COLOR]))
-            else :
-                send_to_device(bytes([0x02, 0x02, 0x16, 0x09, *ON_PLAY_OFF_COLOR]))
+            self._send_pad(0x09, self._play_color())
+
+    def _record_color(self):
+        return ON_RECORD_COLOR if transport.isRecording() else ON_RECORD_OFF_COLOR
             
     def RecordReturn(self, isShift) :
         if not isShift:
-            if transport.isRecording() :
-                send_to_device(bytes([0x02, 0x02, 0x16, 0x0A, *ON_RECORD_COLOR]))
-            else :
-                send_to_device(bytes([0x02, 0x02, 0x16, 0x0A, *ON_RECORD_OFF_COLOR]))
+            self._send_pad(0x0A, self._record_color())
 
     def ProcessPlayBlink(self, value, isShift):
         self.isWaitingForInput = False
         if not isShift:
-            COLOR_PLAY_ON = bytes([0x02, 0x02, 0x16, 0x09, *ON_PLAY_COLOR]) 
-            COLOR_PLAY_OFF =  bytes([0x02, 0x02, 0x16, 0x09, *ON_PLAY_OFF_COLOR]) 
             if value == 0 :
-                send_to_device(COLOR_PLAY_OFF)
+                self._send_pad(0x09, ON_PLAY_OFF_COLOR)
             else :
-                send_to_device(COLOR_PLAY_ON)
+                self._send_pad(0x09, ON_PLAY_COLOR)
         
     def ProcessRecordBlink(self, value, isShift) :
         if not isShift:
             if transport.isRecording() :            
-                COLOR_RECORDING_ON = bytes([0x02, 0x02, 0x16, 0x0A, *ON_RECORD_COLOR]) 
-                COLOR_RECORDING_OFF = bytes([0x02, 0x02, 0x16, 0x0A, *ON_RECORD_OFF_COLOR]) 
                 if value == 0 :
-                    send_to_device(COLOR_RECORDING_OFF)
+                    self._send_pad(0x0A, ON_RECORD_OFF_COLOR)
                 else :
-                    send_to_device(COLOR_RECORDING_ON)
+                    self._send_pad(0x0A, ON_RECORD_COLOR)
                 
     def LEDTest(self) :
         send_to_device(bytes([0x02, 0x02, 0x16, 0x04, 0x00, 0x00, 0x7f]))
         send_to_device(bytes([0x02, 0x02, 0x16, 0x05, 0x00, 0x00, 0x00]))
+        FlushOutput()
         time.sleep(1.0)
         send_to_device(bytes([0x02, 0x02, 0x16, 0x04, 0x00, 0x00, 0x00]))
         send_to_device(bytes([0x02, 0x02, 0x16, 0x05, 0x00, 0x00, 0x7f]))
+        FlushOutput()
         time.sleep(1.0)
 
     
@@ -0,0 +1,74 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import time
+import transport
+
+
+# This class moves the song position for Rewind and FastForward.
+# Each event adds SCRUB_TICKS to a local total instead of reading and setting the song position,
+# more the longer the button is worked. The total is applied with a single setSongPos per
+# OnIdle, and the position hint is shown at most once per SCRUB_HINT_INTERVAL_S, the last one
+# always making it to the screen.
+
+
+## CONSTANT
+
+# Ticks moved by one event at the start of a scrub
+SCRUB_TICKS = 24
+
+# Events closer than this belong to the same scrub
+SCRUB_CONTINUE_S = 0.3
+
+# The step grows by SCRUB_TICKS every SCRUB_RAMP_S seconds of scrubbing, up to SCRUB_MAX_FACTOR times
+SCRUB_RAMP_S = 0.5
+SCRUB_MAX_FACTOR = 8
+
+SCRUB_HINT_INTERVAL_S = 0.1
+
+
+class MiniLabScrubber:
+
+    def __init__(self, refresh_fn):
+        # refresh_fn(forward) shows the position hint
+        self._refresh_fn = refresh_fn
+        self._ticks = 0
+        self._start = 0.0
+        self._last_event = 0.0
+        self._forward = True
+        self._last_hint = 0.0
+        self._hint_pending = False
+
+    def Move(self, forward):
+        now = time.perf_counter()
+        if forward != self._forward or now - self._last_event > SCRUB_CONTINUE_S:
+            self._start = now
+        self._forward = forward
+        self._last_event = now
+
+        factor = min(1 + int((now - self._start) / SCRUB_RAMP_S), SCRUB_MAX_FACTOR)
+        if forward:
+            self._ticks += SCRUB_TICKS * factor
+        else:
+            self._ticks -= SCRUB_TICKS * factor
+
+    def Idle(self):
+        if self._ticks:
+            pos = transport.getSongPos(2)
+            transport.setSongPos(pos + self._ticks, 2)
+            self._ticks = 0
+            self._hint_pending = True
+
+        if self._hint_pending:
+            now = time.perf_counter()
+            if now - self._last_hint >= SCRUB_HINT_INTERVAL_S:
+                self._hint_pending = False
+                self._last_hint = now
+                self._refresh_fn(self._forward)
@@ -0,0 +1,62 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import time
+
+from MiniLab3Dispatch import GetTraffic
+
+
+# This class collects the live figures of the diagnostics page:
+# events per second, worst event time and sysex bytes per second.
+# The event path only increments counters, the figures are computed in OnIdle.
+
+
+## CONSTANT
+
+# Period over which the figures are computed, it is also the refresh rate of the page
+STATS_INTERVAL_S = 1.0
+
+
+class MiniLabStats:
+
+    def __init__(self):
+        self._events = 0
+        self._worst = 0.0
+        self._window_start = time.monotonic()
+        self._window_bytes = GetTraffic().TotalBytes()
+
+    def AddEvent(self, seconds):
+        self._events += 1
+        if seconds > self._worst:
+            self._worst = seconds
+
+    def AddWork(self, seconds):
+        # Work left by the events for OnIdle (knob and fader values), it counts in the worst time
+        if seconds > self._worst:
+            self._worst = seconds
+
+    def Update(self):
+        # Returns (events/s, worst event ms, sysex bytes/s) once per interval, None otherwise
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < STATS_INTERVAL_S:
+            return None
+
+        total_bytes = GetTraffic().TotalBytes()
+        figures = (
+            self._events / elapsed,
+            self._worst * 1000,
+            (total_bytes - self._window_bytes) / elapsed,
+        )
+        self._events = 0
+        self._worst = 0.0
+        self._window_start = now
+        self._window_bytes = total_bytes
+        return figures
@@ -0,0 +1,63 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import time
+
+
+# This class watches the time spent in each FL callback.
+# When the callbacks go over their budget repeatedly, it asks the script to shed the
+# non-essential work (screen and LED refreshes) until the load drops again.
+# Notes, pads and transport are always processed.
+
+
+## CONSTANT
+
+# Time budget of each FL callback, in seconds
+BUDGET_MIDI_MSG_S = 0.002
+BUDGET_PITCH_BEND_S = 0.002
+BUDGET_REFRESH_S = 0.010
+BUDGET_IDLE_S = 0.005
+BUDGET_BEAT_S = 0.002
+
+# Number of overruns within OVERRUN_WINDOW_S that start the shedding
+OVERRUN_LIMIT = 3
+OVERRUN_WINDOW_S = 1.0
+
+# Time without any overrun before the shedding stops
+RECOVERY_S = 1.0
+
+
+class MiniLabWatchdog:
+
+    def __init__(self, on_change):
+        # on_change(shedding) is called when the shedding starts or stops
+        self._on_change = on_change
+        self.shedding = False
+        self._overruns = 0
+        self._window_start = 0.0
+        self._last_overrun = 0.0
+
+    def Check(self, budget, start):
+        # Called at the end of a callback which started at time.perf_counter() == start
+        now = time.perf_counter()
+        if now - start > budget:
+            if now - self._window_start > OVERRUN_WINDOW_S:
+                self._window_start = now
+                self._overruns = 0
+            self._overruns += 1
+            self._last_overrun = now
+            if not self.shedding and self._overruns >= OVERRUN_LIMIT:
+                self.shedding = True
+                self._on_change(True)
+
+        elif self.shedding and now - self._last_overrun > RECOVERY_S:
+            self.shedding = False
+            self._overruns = 0
+            self._on_change(False)
@@ -12,6 +12,7 @@
 """
 
 
+import os
 import time
 import midi
 import ui
@@ -21,8 +22,6 @@ import transport
 import channels
 import playlist
 import patterns
-import plugins
-import device
 
 
 
@@ -33,7 +32,15 @@ from MiniLab3Display import MiniLabDisplay
 from MiniLab3Pages import MiniLabPagedDisplay
 from MiniLab3Connexion import MiniLabConnexion
 from MiniLab3Dispatch import send_to_device
-import ArturiaVCOL
+import MiniLab3Dispatch
+import MiniLab3HostCalls
+import MiniLab3BlackBox
+import MiniLab3Watchdog
+from MiniLab3Watchdog import MiniLabWatchdog
+from MiniLab3Jitter import MiniLabJitterMonitor
+from MiniLab3PitchBend import MiniLabPitchBend
+from MiniLab3Recorder import MiniLabRecorder
+import MiniLab3Recorder
 
 ## CONSTANT
 
@@ -41,6 +48,34 @@ TEMP = 0.5
 COLOUR = [0x10,0x11,0x04,0x05,0x14,0x7F,0x01]
 PORT_MIDICC_ANALOGLAB = 10
 
+# Set to True to record every callback into RECORD_FILE, it can then be replayed with tools/replay.py
+RECORD_SESSION = False
+RECORD_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'session.ml3rec')
+
+_recorder = None
+
+# Always-on black box: ring buffer file of the last MIDI events in and sysex out, read it with tools/blackbox.py
+BLACK_BOX = True
+BLACK_BOX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'blackbox.ml3bb')
+
+# Set to True to time every handler, MiniLab3Dispatch.DumpHandlerTimes() then prints the histograms
+TIME_HANDLERS = False
+
+# Seconds between two sysex traffic summaries in the script output, 0 to disable
+TRAFFIC_SUMMARY_S = 0
+
+_next_traffic_summary = 0
+
+# Set to True to count the FL API calls made in each callback and handler,
+# MiniLab3HostCalls.DumpHostCalls() then prints them. Debug only, it slows every host call down.
+COUNT_HOST_CALLS = False
+
+# Set to True to monitor the inter-arrival, bursts and gaps of the incoming events per control,
+# _jitter.Dump() then prints them
+MONITOR_INPUT = False
+
+_jitter = None
+
 #-----------------------------------------------------------------------------------------
 
 # This is the master class. It will run the init lights pattern 
@@ -108,14 +143,33 @@ class MidiControllerConfig :
 
 # Function called for each event 
 def OnMidiMsg(event) :
+    start = time.perf_counter()
     # print(event)
+    if MiniLab3BlackBox.box is not None:
+        MiniLab3BlackBox.box.LogIn(event)
+    if _recorder is not None:
+        _recorder.RecordEvent(MiniLab3Recorder.REC_MIDI_MSG, event)
+    if _jitter is not None:
+        _jitter.AddEvent(event)
     if _processor.ProcessEvent(event):
         event.handled = True
+    MiniLab3Dispatch.EndOfCallback()
+    _watchdog.Check(MiniLab3Watchdog.BUDGET_MIDI_MSG_S, start)
 
     # _mk3.LightReturn().updateAll(SHIFT)
 
     # event.handled = False
 
+# Function called for each sysex sent by the controller
+def OnSysEx(event) :
+    start = time.perf_counter()
+    if _recorder is not None:
+        _recorder.RecordSysex(event)
+    if _processor.ProcessSysex(event):
+        event.handled = True
+    MiniLab3Dispatch.EndOfCallback()
+    _watchdog.Check(MiniLab3Watchdog.BUDGET_MIDI_MSG_S, start)
+
 # Function called when FL Studio is starting
 
 def OnInit():
@@ -126,6 +180,7 @@ def OnInit():
     _mk3.paged_display().SetPageLines('welcome', 10, line1=ui.getProgTitle(), line2="Connected")
     _mk3.paged_display().SetActivePage('welcome', expires=1500)
     _mk3.paged_display().SetActivePage('main')
+    MiniLab3Dispatch.FlushOutput()
     print("### Messages successfully sent to MINILAB3 ###")
 
 
@@ -133,10 +188,25 @@ def OnInit():
 def init() :
     
     # Connxexion
+    if BLACK_BOX:
+        MiniLab3BlackBox.Open(BLACK_BOX_FILE)
     global _mk3 
     _mk3 = MidiControllerConfig()
     global _processor
     _processor = MiniLabMidiProcessor(_mk3) 
+    global _watchdog
+    _watchdog = MiniLabWatchdog(SetShedding)
+    global _pitch_bend
+    _pitch_bend = MiniLabPitchBend()
+    global _jitter
+    if MONITOR_INPUT:
+        _jitter = MiniLabJitterMonitor()
+    global _recorder
+    if RECORD_SESSION:
+        _recorder = MiniLabRecorder(RECORD_FILE)
+    MiniLab3Dispatch.EnableHandlerTiming(TIME_HANDLERS)
+    if COUNT_HOST_CALLS:
+        MiniLab3HostCalls.Install()
     _mk3.connexion().DAWConnexion()
     print("### Successfully created class objects ###")
     
@@ -148,6 +218,10 @@ def OnDeInit():
     # _mk3.paged_display().SetPageLines('goodbye1', 12, line1=ui.getProgTitle(), line2="Disconnected")
     # _mk3.paged_display().SetActivePage('goodbye1', 1500)
     _mk3.connexion().DAWDisconnection()
+    if _recorder is not None:
+        _recorder.Flush()
+    MiniLab3Dispatch.FlushOutput()
+    MiniLab3BlackBox.Close()
     #_mk3.connexion().ArturiaDisconnection()
     time.sleep(2)
     return
@@ -156,12 +230,27 @@ def OnDeInit():
 # Function called when Play/Pause button is ON
 
 def OnUpdateBeatIndicator(value):
+    start = time.perf_counter()
+    if _recorder is not None:
+        _recorder.RecordCall(MiniLab3Recorder.REC_BEAT, value)
     _mk3.LightReturn().ProcessPlayBlink(value, _processor.shift)
     _mk3.LightReturn().ProcessRecordBlink(value, _processor.shift)
+    MiniLab3Dispatch.EndOfCallback()
+    _watchdog.Check(MiniLab3Watchdog.BUDGET_BEAT_S, start)
 
 # Function called at refresh, flag value changes depending on the refresh type 
 
 def OnRefresh(flags) :
+    start = time.perf_counter()
+    if _recorder is not None:
+        _recorder.RecordCall(MiniLab3Recorder.REC_REFRESH, flags)
+    _pitch_bend.Invalidate()
+    if _watchdog.shedding:
+        # Screen and LEDs are brought up to date when the load drops
+        MiniLab3Dispatch.EndOfCallback()
+        _watchdog.Check(MiniLab3Watchdog.BUDGET_REFRESH_S, start)
+        return
+
     _mk3.LightReturn().updateAll(_processor.shift, _processor.snapToScale)
     
     # if plugins.isValid(channels.selectedChannel()) :
@@ -185,24 +274,59 @@ def OnRefresh(flags) :
     #print("flags : ", flags)
     if flags not in [4,256,260,4608] :
         _mk3.Sync()
+    MiniLab3Dispatch.EndOfCallback()
+    _watchdog.Check(MiniLab3Watchdog.BUDGET_REFRESH_S, start)
     
 
 
 # Function called time to time mainly to update the beat indicator
 def OnWaitingForInput():
     _mk3.LightReturn().isWaitingForInput = True
+    MiniLab3Dispatch.EndOfCallback()
 
 def OnIdle():
-    _mk3.Idle()
+    start = time.perf_counter()
+    if _recorder is not None:
+        _recorder.RecordCall(MiniLab3Recorder.REC_IDLE)
+    if not _watchdog.shedding:
+        _mk3.Idle()
+    _processor.Idle()
+    _pitch_bend.Idle()
+    if _jitter is not None:
+        _jitter.Tick()
+    if TRAFFIC_SUMMARY_S:
+        PrintTrafficSummary()
+    # Sends the newest frame of each target queued since the last tick
+    MiniLab3Dispatch.FlushOutput()
+    _watchdog.Check(MiniLab3Watchdog.BUDGET_IDLE_S, start)
+
+# Called by the watchdog when the callbacks go over budget, and when the load drops again
+def SetShedding(shedding):
+    _processor.SetShedding(shedding)
+    if shedding:
+        print('MiniLab 3: overloaded, screen and LED refreshes paused')
+    else:
+        _mk3.LightReturn().updateAll(_processor.shift, _processor.snapToScale)
+        _mk3.Sync()
+
+def PrintTrafficSummary():
+    global _next_traffic_summary
+    now = time.monotonic()
+    if now >= _next_traffic_summary:
+        _next_traffic_summary = now + TRAFFIC_SUMMARY_S
+        print(MiniLab3Dispatch.GetTraffic().Summary())
 
 def OnPitchBend(event) :
+    start = time.perf_counter()
+    if _recorder is not None:
+        _recorder.RecordEvent(MiniLab3Recorder.REC_PITCH_BEND, event)
+
+    if _pitch_bend.Process(event) :
+        event.handled = True
+    MiniLab3Dispatch.EndOfCallback()
+    _watchdog.Check(MiniLab3Watchdog.BUDGET_PITCH_BEND_S, start)
+        
+
 
-    if channels.selectedChannel(1) != -1 :
-        if plugins.isValid(channels.selectedChannel()) : 
-            if plugins.getPluginName(channels.selectedChannel()) not in ArturiaVCOL.V_COL :
-                channels.setChannelPitch(channels.selectedChannel(),(event.data2-64)*(200/64),1)
-                event.handled = True
-            else :
-                device.forwardMIDICC(event.status + (event.data1 << 8) + (event.data2 << 16) + (PORT_MIDICC_ANALOGLAB << 24))
-                event.handled = True
-        
\ No newline at end of file
+if COUNT_HOST_CALLS:
+    MiniLab3HostCalls.ScopeEntryPoints(globals())
@@ -0,0 +1,30 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# The tests drive the script through tools/harness.py, against the FL Studio stand-ins
+
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from harness import Harness
+
+
+@pytest.fixture
+def harness():
+    # A freshly loaded and initialized script, its prints kept out of the test output
+    with contextlib.redirect_stdout(io.StringIO()):
+        h = Harness().init()
+    return h
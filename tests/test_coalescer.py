@@ -0,0 +1,27 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+PLUGIN_WINDOW = 5
+MIXER_WINDOW = 0
+FADER = 14
+
+
+def test_mixer_and_plugin_values_kept_apart(harness):
+    # The same fader moved on mixer track 0 then on plugin channel 0, within one idle tick
+    channel = harness.add_plugin_channel('FLEX')
+    harness.state.track_number = channel
+    harness.focus(MIXER_WINDOW)
+    harness.cc(FADER, 20)
+    harness.focus(PLUGIN_WINDOW)
+    harness.cc(FADER, 100)
+    harness.idle()
+
+    assert harness.state.tracks[channel].volume == 20 / 127
+    assert any(value != 0.5 for _, value in harness.state.channels[channel].params)
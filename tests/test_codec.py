@@ -0,0 +1,94 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import random
+import string
+
+import pytest
+
+SYSEX_HEADER = bytes([0xF0, 0x00, 0x20, 0x6B, 0x7F, 0x42])
+SCREEN_TYPES = (1, 2, 3, 4, 5, 10)
+CASES = 2000
+
+
+# The frames as the display and the LEDs built them before MiniLab3Codec
+
+def reference_frame(data):
+    return SYSEX_HEADER + data + bytes([0xF7])
+
+
+def reference_screen(page_type, value, line1, line2):
+    data_control = bytes([])
+    data_string = bytes([0x04, 0x02, 0x60])
+    data_line1 = bytes([0x01]) + bytearray(line1[:31], 'ascii') + bytes([0x00])
+    data_line2 = bytes([0x02]) + bytearray(line2[:31], 'ascii') + bytes([0x00])
+    if page_type == 2:
+        data_control += bytes([0x1F, 0x02, 0x01, 0x00])
+    elif page_type == 3:
+        data_control += bytes([0x1F, 0x03, 0x01, int(int(value)*127/100), 0x00, 0x00])
+    elif page_type == 4:
+        data_control += bytes([0x1F, 0x04, 0x01, int(int(value)*127/100), 0x00, 0x00])
+    elif page_type == 5:
+        data_control += bytes([0x1F, 0x05, 0x01, 0x00, 0x00, 0x00])
+    elif page_type == 10:
+        data_control += bytes([0x1F, 0x07, 0x01, value[0], value[1], 0x01, 0x00])
+    return reference_frame(data_string + data_control + data_line1 + data_line2)
+
+
+def random_line(rng):
+    return ''.join(rng.choice(string.printable[:95]) for _ in range(rng.randrange(0, 40)))
+
+
+@pytest.fixture
+def codec(harness):
+    import MiniLab3Codec
+    return MiniLab3Codec
+
+
+def test_screen_matches_reference(codec):
+    rng = random.Random(24)
+    for _ in range(CASES):
+        page_type = rng.choice(SCREEN_TYPES)
+        if page_type == 10:
+            value = (rng.randrange(128), rng.randrange(128))
+        elif page_type in (3, 4):
+            value = rng.randrange(101)
+        else:
+            value = 0
+        line1 = random_line(rng)
+        line2 = random_line(rng)
+        assert codec.screen(page_type, value, line1, line2) == reference_screen(page_type, value, line1, line2)
+
+
+def test_pad_color_matches_reference(codec):
+    rng = random.Random(24)
+    for _ in range(CASES):
+        pad = rng.randrange(128)
+        rgb = [rng.randrange(128) for _ in range(rng.choice((3, 4)))]
+        assert codec.pad_color(pad, rgb) == reference_frame(bytes([0x02, 0x02, 0x16, pad, *rgb]))
+
+
+def test_all_pads_matches_reference(codec):
+    rng = random.Random(24)
+    for _ in range(CASES):
+        colors = [rng.randrange(128) for _ in range(24)]
+        assert codec.all_pads(colors) == reference_frame(bytes([0x04, 0x02, 0x16, 0x00] + colors))
+
+
+def test_frames_are_reused(codec):
+    assert codec.pad_color(0x04, [1, 2, 3]) is codec.pad_color(0x04, (1, 2, 3))
+    assert codec.all_pads(bytes(24)) is codec.all_pads([0] * 24)
+    assert codec.screen(2, 0, 'a', 'b') is codec.screen(2, 0, 'a', 'b')
+
+
+def test_cache_is_bounded(codec):
+    for i in range(codec.MAX_CACHED_FRAMES + 10):
+        codec.screen(1, 0, str(i), '')
+    assert len(codec._screen_frames) <= codec.MAX_CACHED_FRAMES
@@ -0,0 +1,99 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import contextlib
+import io
+
+
+# Released, pressed and a few values in between
+DATA2_SAMPLES = (0, 1, 64, 127)
+
+
+class Event:
+    # The fields the dispatchers read, with the values FL gives to a channel message
+
+    __slots__ = ('status', 'data1', 'data2', 'midiId', 'controlNum', 'controlVal')
+
+    def __init__(self, status, data1, data2):
+        self.status = status
+        self.data1 = data1
+        self.data2 = data2
+        self.midiId = status & 0xF0
+        self.controlNum = data1
+        self.controlVal = data2
+
+
+def tree_handler(dispatcher, event):
+    # Handler MidiEventDispatcher.Dispatch would call, None if the event is dropped
+    from MiniLab3Dispatch import _is_dispatch
+    entry = dispatcher._dispatch_map.get(dispatcher._transform_fn(event))
+    if entry is None:
+        return None
+    callback_fn, filter_fn = entry
+    if not filter_fn(event):
+        return None
+    if _is_dispatch(callback_fn):
+        return tree_handler(callback_fn.__self__, event)
+    return callback_fn
+
+
+def compiled_handler(compiled, event):
+    # Handler CompiledMidiEventDispatcher.Dispatch would call, None if the event is dropped
+    from MiniLab3Dispatch import FLAG_BY_VELOCITY, FLAG_ONLY_PRESSED, FLAG_ONLY_RELEASED, FLAG_FILTER
+    entry = compiled.Lookup(event.status, event.data1)
+    if entry is not None and entry[1] & FLAG_BY_VELOCITY:
+        entry = entry[2][event.data2]
+    if entry is None:
+        return None
+    callback_fn, flags, extra, _ = entry
+    if flags & FLAG_ONLY_PRESSED and event.controlVal == 0:
+        return None
+    if flags & FLAG_ONLY_RELEASED and event.controlVal != 0:
+        return None
+    if flags & FLAG_FILTER and not extra(event):
+        return None
+    return callback_fn
+
+
+def test_compiled_table_matches_tree(harness):
+    from MiniLab3Dispatch import COMPILED_STATUS, FLAG_BY_VELOCITY
+    processor = harness.script._processor
+    layers = (
+        (processor._midi_id_dispatcher, processor._compiled_dispatcher),
+        (processor._shift_midi_id_dispatcher, processor._compiled_shift_dispatcher),
+    )
+    for tree, compiled in layers:
+        mismatches = []
+        for status in COMPILED_STATUS:
+            for data1 in range(128):
+                entry = compiled.Lookup(status, data1)
+                # data2 picks the handler of the velocity tables, elsewhere it only matters
+                # to the press and release filters
+                sweep = range(128) if entry is not None and entry[1] & FLAG_BY_VELOCITY else DATA2_SAMPLES
+                for data2 in sweep:
+                    event = Event(status, data1, data2)
+                    if tree_handler(tree, event) != compiled_handler(compiled, event):
+                        mismatches.append((status, data1, data2))
+        assert not mismatches, mismatches[:10]
+
+
+def test_uncompiled_dispatch_times_leaf_handlers(harness):
+    import MiniLab3Dispatch
+    processor = harness.script._processor
+    processor._layers = (processor._midi_id_dispatcher, processor._shift_midi_id_dispatcher)
+    processor._dispatcher = processor._layers[0]
+    MiniLab3Dispatch.EnableHandlerTiming(True)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            harness.pad(37)
+        names = [histogram.name for histogram in MiniLab3Dispatch.GetHandlerTimes()]
+    finally:
+        MiniLab3Dispatch.EnableHandlerTiming(False)
+    assert names == ['WaitForInput']
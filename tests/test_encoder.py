@@ -0,0 +1,72 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import time
+
+import fl_state
+from harness import FLMidiEvent
+
+ENCODER = 28
+CHANNEL_RACK = 1
+BROWSER = 4
+
+
+def turn(harness, clicks):
+    # clicks > 0 turns right, the magnitude is the encoder speed (1 to 8)
+    return harness.cc(ENCODER, 64 + clicks if clicks > 0 else 63 + clicks)
+
+
+def test_slow_click_moves_by_its_magnitude(harness):
+    harness.focus(BROWSER)
+    turn(harness, 3)
+    assert harness.state.browser_index == 3
+    turn(harness, -2)
+    assert harness.state.browser_index == 1
+
+
+def test_fast_spin_multiplies_the_steps(harness):
+    import MiniLab3Process
+    harness.focus(BROWSER)
+    events = 2 * MiniLab3Process.ENCODER_RAMP_EVENTS
+    for _ in range(events):
+        turn(harness, 1)
+    # The first ENCODER_RAMP_EVENTS events move by one, the next ones by two
+    assert harness.state.browser_index == 3 * MiniLab3Process.ENCODER_RAMP_EVENTS % len(harness.state.browser)
+
+
+def test_steps_capped(harness):
+    import MiniLab3Process
+    processor = harness.script._processor
+    event = FLMidiEvent(0xB0, ENCODER, 72)
+    steps = [processor._encoder_steps(event) for _ in range(4 * MiniLab3Process.ENCODER_RAMP_EVENTS)]
+    assert max(steps) == MiniLab3Process.ENCODER_MAX_STEPS
+
+
+def test_popup_menu_moves_by_one(harness):
+    harness.focus(BROWSER)
+    harness.state.popup_menu = True
+    turn(harness, 5)
+    assert harness.state.browser_index == 1
+
+
+def test_mixer_track_follows_once_the_encoder_rests(harness):
+    import MiniLab3Process
+    harness.state.channels = [fl_state.FLChannel('Channel %d' % i, fx_track=i + 1) for i in range(8)]
+    harness.state.selected_channel = 0
+    harness.state.track_number = 0
+    harness.focus(CHANNEL_RACK)
+    turn(harness, 2)
+    harness.idle()
+    assert harness.state.selected_channel == 2
+    assert harness.state.track_number == 0
+
+    time.sleep(MiniLab3Process.ENCODER_SETTLE_S)
+    harness.idle()
+    assert harness.state.track_number == 3
@@ -0,0 +1,23 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+from harness import FLMidiEvent
+
+
+def test_pads_and_keys_in_separate_slots(harness):
+    import MiniLab3Jitter
+    monitor = MiniLab3Jitter.MiniLabJitterMonitor()
+    # Drum pad 36 on channel 10, then key 36 on channel 1
+    monitor.AddEvent(FLMidiEvent(0x99, 36, 100))
+    monitor.AddEvent(FLMidiEvent(0x90, 36, 100))
+    monitor.Tick()
+    labels = [label for label, _ in monitor.Controls()]
+    assert labels == ['note 36 ch1', 'note 36 ch10']
+    assert sum(monitor.coalescable) == 0
@@ -0,0 +1,98 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import time
+
+import pytest
+
+
+@pytest.fixture
+def queue(harness):
+    import MiniLab3Dispatch
+    harness.idle()
+    harness.clear_output()
+    return MiniLab3Dispatch.OutputQueue(max_delay_s=0.01)
+
+
+def sent(harness):
+    return [bytes(frame) for frame in harness.sysex_out]
+
+
+def test_newer_frame_replaces_queued_one(harness, queue):
+    import MiniLab3Codec
+    queue.Put(MiniLab3Codec.pad_color(0x04, [1, 1, 1]))
+    queue.Put(MiniLab3Codec.pad_color(0x04, [2, 2, 2]))
+    queue.Put(MiniLab3Codec.screen(2, 0, 'a', 'b'))
+    queue.Put(MiniLab3Codec.screen(2, 0, 'c', 'd'))
+    assert queue.Pending() == 2
+    assert queue.replaced == 2
+    queue.Flush()
+    assert sent(harness) == [MiniLab3Codec.pad_color(0x04, [2, 2, 2]), MiniLab3Codec.screen(2, 0, 'c', 'd')]
+    assert queue.Pending() == 0
+
+
+def test_order_of_last_updates_kept(harness, queue):
+    import MiniLab3Codec
+    queue.Put(MiniLab3Codec.pad_color(0x04, [1, 1, 1]))
+    queue.Put(MiniLab3Codec.pad_color(0x05, [1, 1, 1]))
+    queue.Put(MiniLab3Codec.pad_color(0x04, [2, 2, 2]))
+    queue.Flush()
+    assert sent(harness) == [MiniLab3Codec.pad_color(0x05, [1, 1, 1]), MiniLab3Codec.pad_color(0x04, [2, 2, 2])]
+
+
+def test_all_pads_drops_queued_single_pads(harness, queue):
+    import MiniLab3Codec
+    queue.Put(MiniLab3Codec.pad_color(0x04, [1, 1, 1]))
+    queue.Put(MiniLab3Codec.pad_color(0x0B, [1, 1, 1]))
+    queue.Put(MiniLab3Codec.screen(2, 0, 'a', 'b'))
+    queue.Put(MiniLab3Codec.all_pads([3] * 24))
+    # A single pad after the whole bank is kept, after it
+    queue.Put(MiniLab3Codec.pad_color(0x05, [4, 4, 4]))
+    queue.Flush()
+    assert sent(harness) == [
+        MiniLab3Codec.screen(2, 0, 'a', 'b'),
+        MiniLab3Codec.all_pads([3] * 24),
+        MiniLab3Codec.pad_color(0x05, [4, 4, 4]),
+    ]
+
+
+def test_frames_without_target_all_sent(harness, queue):
+    import MiniLab3Codec
+    other = MiniLab3Codec.frame([0x7E, 0x01])
+    queue.Put(other)
+    queue.Put(other)
+    queue.Flush()
+    assert sent(harness) == [other, other]
+
+
+def test_due_after_max_delay(queue):
+    import MiniLab3Codec
+    assert not queue.IsDue()
+    queue.Put(MiniLab3Codec.pad_color(0x04, [1, 1, 1]))
+    assert not queue.IsDue()
+    time.sleep(0.01)
+    assert queue.IsDue()
+
+
+def test_callbacks_queue_until_idle(harness, monkeypatch):
+    import MiniLab3Dispatch
+    # Nothing goes out before the idle tick, however slow the callbacks are here
+    monkeypatch.setattr(MiniLab3Dispatch.GetOutputQueue(), '_max_delay_s', 60.0)
+    harness.focus(5)
+    harness.cc(86, 70)
+    harness.idle()
+    harness.clear_output()
+    harness.beat(1)
+    harness.beat(0)
+    harness.refresh(0)
+    assert harness.sysex_out == []
+    harness.idle()
+    targets = [bytes(frame[6:10]) for frame in harness.sysex_out]
+    assert len(targets) == len(set(targets))
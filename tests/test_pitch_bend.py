@@ -0,0 +1,32 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import time
+
+
+def test_resting_value_survives_refresh(harness):
+    # The return to the center is held back by the rate limit, a refresh comes in before OnIdle
+    channel = harness.add_plugin_channel('Sytrus')
+    harness.pitch_bend(127)
+    harness.pitch_bend(64)
+    harness.refresh(256)
+    harness.idle()
+    assert harness.state.channels[channel].pitch == 0
+
+
+def test_resting_value_sent_by_idle(harness):
+    channel = harness.add_plugin_channel('Sytrus')
+    harness.pitch_bend(127)
+    harness.pitch_bend(64)
+    # Imported once the harness loaded the script
+    import MiniLab3PitchBend
+    time.sleep(1 / MiniLab3PitchBend.PITCH_BEND_MAX_RATE_HZ)
+    harness.idle()
+    assert harness.state.channels[channel].pitch == 0
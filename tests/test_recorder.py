@@ -0,0 +1,40 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import replay
+
+ARTURIA_MEMORY_REPLY = bytes([0xF0, 0x00, 0x20, 0x6B, 0x7F, 0x42, 0x02, 0x00, 0x40, 0x62, 0x01, 0xF7])
+DAW_MEMORY_REPLY = bytes([0xF0, 0x00, 0x20, 0x6B, 0x7F, 0x42, 0x02, 0x00, 0x40, 0x62, 0x02, 0xF7])
+
+
+def play(harness):
+    harness.cc(86, 70)
+    harness.idle()
+    harness.sysex(ARTURIA_MEMORY_REPLY)
+    harness.sysex(DAW_MEMORY_REPLY)
+    harness.idle()
+
+
+def test_sysex_recorded_and_replayed(harness, tmp_path):
+    path = str(tmp_path / 'session.ml3rec')
+    harness.clear_output()
+    replay.start_recording(harness, path)
+    play(harness)
+    replay.stop_recording(harness)
+    recorded = [bytes(frame) for frame in harness.sysex_out]
+
+    records = replay.load(path)
+    assert [record[6] for record in records if record[6] is not None] == [ARTURIA_MEMORY_REPLY, DAW_MEMORY_REPLY]
+
+    fresh = type(harness)().init()
+    fresh.clear_output()
+    calls = replay.replay(fresh, records)
+    assert calls[replay.MiniLab3Recorder.REC_SYSEX] == 2
+    assert [bytes(frame) for frame in fresh.sysex_out] == recorded
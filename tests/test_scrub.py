@@ -0,0 +1,61 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import transport
+
+REWIND = 103
+FAST_FORWARD = 104
+
+
+def count_set_song_pos(monkeypatch):
+    calls = []
+    set_song_pos = transport.setSongPos
+
+    def counted(*args):
+        calls.append(args)
+        return set_song_pos(*args)
+    monkeypatch.setattr(transport, 'setSongPos', counted)
+    return calls
+
+
+def test_moves_add_up_into_one_set_per_idle(harness, monkeypatch):
+    import MiniLab3Scrub
+    calls = count_set_song_pos(monkeypatch)
+    harness.state.song_pos = 1000
+    for _ in range(5):
+        harness.cc(FAST_FORWARD, 127)
+    assert calls == []
+    harness.idle()
+    assert len(calls) == 1
+    assert harness.state.song_pos == 1000 + 5 * MiniLab3Scrub.SCRUB_TICKS
+
+    harness.cc(REWIND, 127)
+    harness.cc(REWIND, 127)
+    harness.idle()
+    harness.idle()
+    assert len(calls) == 2
+    assert harness.state.song_pos == 1000 + 3 * MiniLab3Scrub.SCRUB_TICKS
+
+
+def test_idle_without_moves_leaves_position(harness, monkeypatch):
+    calls = count_set_song_pos(monkeypatch)
+    harness.idle()
+    assert calls == []
+
+
+def test_long_scrub_speeds_up(harness, monkeypatch):
+    import MiniLab3Scrub
+    # The step reaches its maximum right after the first move
+    monkeypatch.setattr(MiniLab3Scrub, 'SCRUB_RAMP_S', 1e-9)
+    harness.state.song_pos = 0
+    harness.cc(FAST_FORWARD, 127)
+    harness.cc(FAST_FORWARD, 127)
+    harness.idle()
+    assert harness.state.song_pos == MiniLab3Scrub.SCRUB_TICKS * (1 + MiniLab3Scrub.SCRUB_MAX_FACTOR)
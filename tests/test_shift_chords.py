@@ -0,0 +1,97 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+SHIFT = 27
+STOP = 106
+RECORD = 108
+TAP = 109
+
+
+def press(harness, control):
+    harness.cc(control, 127)
+
+
+def release(harness, control):
+    harness.cc(control, 0)
+
+
+def test_stats_chord_keeps_playing(harness):
+    harness.state.playing = True
+    press(harness, SHIFT)
+    press(harness, STOP)
+    press(harness, TAP)
+    release(harness, TAP)
+    release(harness, STOP)
+    release(harness, SHIFT)
+    assert harness.state.playing
+    assert harness.script._processor._stats is not None
+
+
+def test_shift_stop_alone_stops(harness):
+    harness.state.playing = True
+    press(harness, SHIFT)
+    press(harness, STOP)
+    release(harness, STOP)
+    release(harness, SHIFT)
+    assert not harness.state.playing
+
+
+def test_profile_chord_keeps_playing(harness):
+    harness.state.playing = True
+    press(harness, SHIFT)
+    press(harness, STOP)
+    press(harness, RECORD)
+    release(harness, RECORD)
+    release(harness, STOP)
+    release(harness, SHIFT)
+    assert harness.state.playing
+    profiler = harness.script._processor._profiler
+    assert profiler is not None
+    profiler._profile.disable()
+
+
+def test_shift_stop_stops_when_shift_released_first(harness):
+    harness.state.playing = True
+    press(harness, SHIFT)
+    press(harness, STOP)
+    release(harness, SHIFT)
+    release(harness, STOP)
+    assert not harness.state.playing
+
+
+def test_profile_chord_with_stop_released_first(harness):
+    harness.state.playing = True
+    press(harness, SHIFT)
+    press(harness, STOP)
+    press(harness, RECORD)
+    release(harness, STOP)
+    release(harness, RECORD)
+    release(harness, SHIFT)
+    assert harness.state.playing
+    assert not harness.state.recording
+    profiler = harness.script._processor._profiler
+    assert profiler is not None
+    profiler._profile.disable()
+
+
+def test_shift_record_alone_records(harness):
+    press(harness, SHIFT)
+    press(harness, RECORD)
+    release(harness, RECORD)
+    release(harness, SHIFT)
+    assert harness.state.recording
+
+
+def test_shift_stop_lights_pad_on_press(harness):
+    press(harness, SHIFT)
+    harness.clear_output()
+    press(harness, STOP)
+    harness.idle()
+    assert [bytes(frame[6:-1]) for frame in harness.sysex_out] == [bytes([0x02, 0x02, 0x16, 0x08, 0x7F, 0x7F, 0x7F])]
@@ -0,0 +1,88 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+import channels
+import mixer
+import plugins
+import transport
+import ui
+
+SHIFT = 27
+ALL_PADS_PREFIX = bytes([0x04, 0x02, 0x16, 0x00])
+
+
+def count_release_host_calls(harness, monkeypatch):
+    # Every call to the FL modules made while the pads are put back on shift release,
+    # by 'module.function'
+    calls = []
+    counting = []
+    for module in (channels, mixer, plugins, transport, ui):
+        for name, function in list(vars(module).items()):
+            if callable(function) and not name.startswith('_') and getattr(function, '__module__', None) == module.__name__:
+                def counted(*args, _name='%s.%s' % (module.__name__, name), _function=function, **kwargs):
+                    if counting:
+                        calls.append(_name)
+                    return _function(*args, **kwargs)
+                monkeypatch.setattr(module, name, counted)
+
+    light = harness.script._mk3.LightReturn()
+    shift_released = light.ShiftReleased
+
+    def counted_shift_released(*args):
+        counting.append(True)
+        try:
+            return shift_released(*args)
+        finally:
+            counting.clear()
+    monkeypatch.setattr(light, 'ShiftReleased', counted_shift_released)
+    return calls
+
+
+def payloads(harness):
+    return [bytes(frame[6:-1]) for frame in harness.sysex_out]
+
+
+def test_shift_release_sends_cached_pads(harness, monkeypatch):
+    harness.cc(SHIFT, 127)
+    harness.idle()
+    harness.clear_output()
+    calls = count_release_host_calls(harness, monkeypatch)
+    harness.cc(SHIFT, 0)
+    assert calls == []
+    monkeypatch.undo()
+    harness.idle()
+    sent = payloads(harness)
+    assert len(sent) == 1
+    assert sent[0].startswith(ALL_PADS_PREFIX)
+
+
+def test_shift_release_reads_state_changed_under_shift(harness, monkeypatch):
+    harness.cc(SHIFT, 127)
+    harness.state.playing = True
+    harness.refresh(0)
+    harness.idle()
+    harness.clear_output()
+    calls = count_release_host_calls(harness, monkeypatch)
+    harness.cc(SHIFT, 0)
+    assert 'transport.isRecording' in calls
+    monkeypatch.undo()
+    harness.idle()
+    sent = payloads(harness)
+    assert len(sent) == 1
+    assert sent[0].startswith(ALL_PADS_PREFIX)
+
+
+def test_compiled_layer_follows_shift(harness):
+    processor = harness.script._processor
+    assert processor._dispatcher is processor._compiled_dispatcher
+    harness.cc(SHIFT, 127)
+    assert processor._dispatcher is processor._compiled_shift_dispatcher
+    harness.cc(SHIFT, 0)
+    assert processor._dispatcher is processor._compiled_dispatcher
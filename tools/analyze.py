@@ -0,0 +1,324 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Offline analysis of recorded sessions, vectorized with NumPy so that traces of
+# millions of events are handled in seconds.
+#
+#   python tools/analyze.py trace session.ml3rec trace.npz   Replay a session, timing every callback
+#                                                            and logging every sysex sent
+#   python tools/analyze.py report trace.npz                 Latency, inter-arrival and traffic report
+#   python tools/analyze.py report session.ml3rec            Inter-arrival report only (no timings)
+#
+# Events are grouped per mapped control, with the same keys as the MidiEventDispatcher
+# chain of MiniLabMidiProcessor: (status, controlNum), pitch bend being a single control.
+#
+# NumPy is only needed by this tool, never by the script itself.
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit('tools/analyze.py needs NumPy (pip install numpy)')
+
+from harness import Harness, FLMidiEvent
+
+import MiniLab3Dispatch
+import MiniLab3Recorder
+from MiniLab3Recorder import ReadSession, SysexPayloads, RECORD_FIELDS, CALLBACK_NAMES
+
+PERCENTILES = (0.5, 0.9, 0.99, 1.0)
+
+SESSION_FIELDS = [name for name, _ in RECORD_FIELDS]
+
+# Key of the records that are not MIDI events: one group per callback
+CALLBACK_KEY_BASE = 256 * 128
+
+# Key of the OnPitchBend records, one per status. FL calls OnMidiMsg first with the same bend,
+# that pass keeps the MIDI event key.
+PITCH_BEND_KEY_BASE = CALLBACK_KEY_BASE + 256
+
+
+# LOADING
+
+def load_session(path):
+    # Session file written by the recorder -> dict of arrays
+    session = ReadSession(path)
+    loaded = {name: np.frombuffer(session[name], dtype=session[name].typecode) for name in SESSION_FIELDS}
+    loaded['payload'] = np.frombuffer(bytes(session['payload']), dtype=np.uint8)
+    return loaded
+
+
+def load_trace(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def save_trace(path, trace):
+    np.savez_compressed(path, **trace)
+
+
+def trace_session(path):
+    # Replays a session, timing each callback and logging the sysex sent by each of them
+    session = load_session(path)
+    payloads = SysexPayloads(session)
+    records = list(zip(*(session[name].tolist() for name in ('kind', 'status', 'data1', 'data2', 'flags')), payloads))
+    durations = np.empty(len(records))
+    frames_per_record = np.zeros(len(records), dtype=np.int64)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        h = Harness().init()
+        h.clear_output()
+        script = h.script
+        sent = h.state.sysex_out
+        clock = time.perf_counter
+        for i, (kind, status, data1, data2, flags, sysex) in enumerate(records):
+            before = len(sent)
+            if kind == MiniLab3Recorder.REC_MIDI_MSG:
+                event = FLMidiEvent(status, data1, data2)
+                start = clock()
+                script.OnMidiMsg(event)
+            elif kind == MiniLab3Recorder.REC_PITCH_BEND:
+                event = FLMidiEvent(status, data1, data2)
+                start = clock()
+                script.OnPitchBend(event)
+            elif kind == MiniLab3Recorder.REC_REFRESH:
+                start = clock()
+                script.OnRefresh(flags)
+            elif kind == MiniLab3Recorder.REC_IDLE:
+                start = clock()
+                script.OnIdle()
+            elif kind == MiniLab3Recorder.REC_SYSEX:
+                event = FLMidiEvent(status, sysex=sysex)
+                start = clock()
+                script.OnSysEx(event)
+            else:
+                start = clock()
+                script.OnUpdateBeatIndicator(flags)
+            durations[i] = clock() - start
+            frames_per_record[i] = len(sent) - before
+
+    trace = dict(session)
+    trace['duration'] = durations
+    trace['sysex_count'] = frames_per_record
+    trace['sysex_len'] = np.fromiter((len(frame) for frame in sent), dtype=np.int64, count=len(sent))
+    trace['sysex_data'] = np.frombuffer(b''.join(sent), dtype=np.uint8)
+    return trace
+
+
+# GROUPING
+
+def control_keys(trace):
+    # One key per mapped control: status * 128 + controlNum for OnMidiMsg, a single key per
+    # pitch bend status (one for OnMidiMsg, one for OnPitchBend) and one key per other callback
+    kind = trace['kind'].astype(np.int64)
+    status = trace['status'].astype(np.int64)
+    data1 = trace['data1'].astype(np.int64)
+    is_bend = (status & 0xF0) == 0xE0
+    keys = np.where(is_bend, status * 128, status * 128 + data1)
+    keys = np.where(kind == MiniLab3Recorder.REC_MIDI_MSG, keys, CALLBACK_KEY_BASE + kind)
+    return np.where(kind == MiniLab3Recorder.REC_PITCH_BEND, PITCH_BEND_KEY_BASE + status, keys)
+
+
+def handler_name(processor, status, control_num):
+    # Handler of (status, controlNum), read from the compiled dispatch table of the processor
+    entry = processor._compiled_dispatcher.Lookup(status, control_num)
+    if entry is None:
+        return 'unmapped'
+    if entry[1] & MiniLab3Dispatch.FLAG_BY_VELOCITY:
+        names = sorted({e[0].__name__ for e in entry[2] if e is not None})
+        return '/'.join(names)
+    return entry[0].__name__
+
+
+def key_labels(keys, processor=None):
+    # Readable label of each key, keys being the (few) distinct control keys
+    labels = []
+    for key in keys.tolist():
+        if key >= PITCH_BEND_KEY_BASE:
+            labels.append('%s ch%d' % (CALLBACK_NAMES[MiniLab3Recorder.REC_PITCH_BEND], ((key - PITCH_BEND_KEY_BASE) & 0x0F) + 1))
+            continue
+        if key >= CALLBACK_KEY_BASE:
+            labels.append(CALLBACK_NAMES.get(key - CALLBACK_KEY_BASE, 'callback %d' % key))
+            continue
+        status, data1 = divmod(key, 128)
+        midi_id = status & 0xF0
+        if midi_id == 0xE0:
+            label = 'bend ch%d' % ((status & 0x0F) + 1)
+        elif midi_id == 0xB0:
+            label = 'cc %d ch%d' % (data1, (status & 0x0F) + 1)
+        elif midi_id == 0x80:
+            label = 'note off %d ch%d' % (data1, (status & 0x0F) + 1)
+        else:
+            label = 'note %d ch%d' % (data1, (status & 0x0F) + 1)
+        if processor is not None:
+            label += ' ' + handler_name(processor, status, data1)
+        labels.append(label)
+    return labels
+
+
+def group_percentiles(groups, values, qs=PERCENTILES):
+    # (group ids, counts, values at each quantile) computed with one sort
+    order = np.lexsort((values, groups))
+    sorted_groups = groups[order]
+    sorted_values = values[order]
+    ids, starts, counts = np.unique(sorted_groups, return_index=True, return_counts=True)
+    index = starts[:, None] + np.floor(np.asarray(qs)[None, :] * (counts[:, None] - 1)).astype(np.int64)
+    return ids, counts, sorted_values[index]
+
+
+# ANALYSES
+
+def latency(trace):
+    return group_percentiles(control_keys(trace), trace['duration'])
+
+
+def inter_arrival(trace):
+    # Time between two consecutive events of the same control, each MIDI message counted once
+    # (by its OnMidiMsg record, the OnPitchBend record of a bend comes right after it)
+    keys = control_keys(trace)
+    is_event = trace['kind'] == MiniLab3Recorder.REC_MIDI_MSG
+    keys = keys[is_event]
+    times = trace['time'][is_event]
+    order = np.lexsort((times, keys))
+    keys = keys[order]
+    times = times[order]
+    same = keys[1:] == keys[:-1]
+    return keys[1:][same], np.diff(times)[same]
+
+
+def inter_arrival_histogram(deltas, bins=12):
+    # Log-spaced histogram from 10 us to 10 s
+    edges = np.logspace(-5, 1, bins + 1)
+    counts, _ = np.histogram(np.clip(deltas, edges[0], edges[-1]), bins=edges)
+    return edges, counts
+
+
+def sysex_times(trace):
+    # Session time of each frame: the time of the callback that sent it
+    return np.repeat(trace['time'], trace['sysex_count'])
+
+
+def sliding_rate(times, sizes, window):
+    # Bytes per second over the window ending at each frame
+    cumulative = np.concatenate(([0], np.cumsum(sizes)))
+    left = np.searchsorted(times, times - window, side='right')
+    return (cumulative[1:] - cumulative[left]) / window
+
+
+def sysex_matrix(trace):
+    # Frames as the rows of a zero padded matrix, with their lengths
+    lengths = trace['sysex_len']
+    if len(lengths) == 0:
+        return np.zeros((0, 0), dtype=np.uint8), lengths
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    width = int(lengths.max())
+    columns = np.arange(width)
+    index = offsets[:, None] + columns[None, :]
+    valid = columns[None, :] < lengths[:, None]
+    data = trace['sysex_data']
+    matrix = np.where(valid, data[np.minimum(index, len(data) - 1)], 0).astype(np.uint8)
+    return matrix, lengths
+
+
+def frame_targets(matrix):
+    # Target of each frame: the first 4 payload bytes (command + LED id), the screen being one target
+    if matrix.shape[1] < 10:
+        return np.zeros(len(matrix), dtype=np.int64)
+    head = matrix[:, 6:10].astype(np.int64)
+    is_display = (head[:, 0] == 0x04) & (head[:, 1] == 0x02) & (head[:, 2] == 0x60)
+    head[is_display, 3] = 0
+    return (head[:, 0] << 24) | (head[:, 1] << 16) | (head[:, 2] << 8) | head[:, 3]
+
+
+def redundant_frames(trace):
+    # Mask of the frames identical to the previous frame sent to the same target
+    matrix, lengths = sysex_matrix(trace)
+    redundant = np.zeros(len(lengths), dtype=bool)
+    if len(lengths) < 2:
+        return redundant, frame_targets(matrix)
+    targets = frame_targets(matrix)
+    order = np.argsort(targets, kind='stable')
+    same_target = targets[order][1:] == targets[order][:-1]
+    same_frame = np.all(matrix[order][1:] == matrix[order][:-1], axis=1) & (lengths[order][1:] == lengths[order][:-1])
+    redundant[order[1:]] = same_target & same_frame
+    return redundant, targets
+
+
+# REPORT
+
+def report(trace, window=1.0, out=sys.stdout):
+    with contextlib.redirect_stdout(io.StringIO()):
+        processor = Harness().init().script._processor
+
+    has_timings = 'duration' in trace
+    print('%d records over %.1f s' % (len(trace['time']), trace['time'][-1] if len(trace['time']) else 0), file=out)
+
+    if has_timings:
+        ids, counts, values = latency(trace)
+        labels = key_labels(ids, processor)
+        print('\nLatency per control (us)', file=out)
+        print('  %-34s %8s %9s %9s %9s %9s' % ('control', 'count', 'p50', 'p90', 'p99', 'max'), file=out)
+        for label, count, row in sorted(zip(labels, counts.tolist(), (values * 1e6).tolist()), key=lambda x: -x[2][2]):
+            print('  %-34s %8d %9.1f %9.1f %9.1f %9.1f' % ((label, count) + tuple(row)), file=out)
+
+    keys, deltas = inter_arrival(trace)
+    if len(deltas):
+        ids, counts, values = group_percentiles(keys, deltas)
+        labels = key_labels(ids, processor)
+        print('\nInter-arrival per control (ms)', file=out)
+        print('  %-34s %8s %9s %9s %9s %9s' % ('control', 'count', 'p50', 'p90', 'p99', 'max'), file=out)
+        for label, count, row in zip(labels, counts.tolist(), (values * 1e3).tolist()):
+            print('  %-34s %8d %9.2f %9.2f %9.2f %9.1f' % ((label, count) + tuple(row)), file=out)
+        edges, hist = inter_arrival_histogram(deltas)
+        print('\nInter-arrival distribution', file=out)
+        for low, high, count in zip(edges[:-1].tolist(), edges[1:].tolist(), hist.tolist()):
+            print('  %10.3f - %10.3f ms %9d' % (low * 1e3, high * 1e3, count), file=out)
+
+    if has_timings and len(trace['sysex_len']):
+        times = sysex_times(trace)
+        rates = sliding_rate(times, trace['sysex_len'], window)
+        redundant, targets = redundant_frames(trace)
+        print('\nSysex traffic', file=out)
+        print('  %d frames, %d bytes' % (len(trace['sysex_len']), int(trace['sysex_len'].sum())), file=out)
+        print('  bytes/s over %.2f s windows: p50 %.0f, p99 %.0f, max %.0f' % (
+            window, np.percentile(rates, 50), np.percentile(rates, 99), rates.max()), file=out)
+        print('  redundant frames: %d (%.1f%%)' % (int(redundant.sum()), 100.0 * redundant.mean()), file=out)
+        ids, per_target = np.unique(targets, return_counts=True)
+        dup_per_target = np.bincount(np.searchsorted(ids, targets), weights=redundant, minlength=len(ids))
+        for target, count, dup in zip(ids.tolist(), per_target.tolist(), dup_per_target.tolist()):
+            print('    target %08X %9d frames %6.1f%% redundant' % (target, count, 100.0 * dup / count), file=out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze recorded MiniLab 3 sessions.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    trace_parser = commands.add_parser('trace', help='Replay a session and save the timed trace')
+    trace_parser.add_argument('session')
+    trace_parser.add_argument('output')
+    report_parser = commands.add_parser('report', help='Print the analysis of a trace or a session')
+    report_parser.add_argument('input')
+    report_parser.add_argument('--window', type=float, default=1.0, help='Sliding window in seconds')
+    args = parser.parse_args(argv)
+
+    if args.command == 'trace':
+        save_trace(args.output, trace_session(args.session))
+    else:
+        trace = load_trace(args.input) if args.input.endswith('.npz') else load_session(args.input)
+        report(trace, args.window)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Micro-benchmarks of the hot callbacks of the script, run against the FL stubs.
+#
+#   python tools/bench.py                          Print the timings
+#   python tools/bench.py --save                   Store them as the baseline
+#   python tools/bench.py --compare --threshold 15 Fail if a case is 15% slower than the baseline
+#
+# Timings are the best per-call time over several rounds, in microseconds. Baselines are only
+# meaningful on the machine that produced them.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+from harness import Harness, FLMidiEvent, TOOLS_DIR
+
+DEFAULT_BASELINE = os.path.join(TOOLS_DIR, 'bench_baseline.json')
+DEFAULT_THRESHOLD = 20.0
+
+WidChannelRack = 1
+WidBrowser = 4
+WidPlugin = 5
+
+
+def _cycle(events):
+    # Returns a function giving the next event of the list at each call
+    state = [0]
+    count = len(events)
+
+    def next_event():
+        index = state[0]
+        state[0] = (index + 1) % count
+        event = events[index]
+        event.handled = False
+        return event
+    return next_event
+
+
+def _sweep(status, data1, values):
+    return _cycle([FLMidiEvent(status, data1, value) for value in values])
+
+
+# CASES
+# Each case gets a harness (already initialised) and returns the function to time.
+
+def case_drum_pad(h):
+    # Stop pad: transport + LED frames, press then release
+    next_event = _cycle([FLMidiEvent(0x99, 40, 100), FLMidiEvent(0x89, 40, 0)])
+    process = h.script._processor.ProcessEvent
+    return lambda: process(next_event())
+
+
+def case_cc_knob(h):
+    h.focus(WidPlugin)
+    h.state.selected_channel = 1
+    next_event = _sweep(0xB0, 86, range(128))
+    process = h.script._processor.ProcessEvent
+    return lambda: process(next_event())
+
+
+def case_fader(h):
+    h.focus(WidChannelRack)
+    next_event = _sweep(0xB0, 14, range(128))
+    process = h.script._processor.ProcessEvent
+    return lambda: process(next_event())
+
+
+def case_knob_tick(h):
+    # One idle tick of a fast knob move: 8 CC then OnIdle, which applies what was held back
+    h.focus(WidPlugin)
+    h.state.selected_channel = 1
+    next_event = _sweep(0xB0, 86, range(128))
+    process = h.script._processor.ProcessEvent
+    idle = h.script.OnIdle
+
+    def run():
+        for _ in range(8):
+            process(next_event())
+        idle()
+    return run
+
+
+def case_encoder(h):
+    h.focus(WidBrowser)
+    next_event = _cycle([FLMidiEvent(0xB0, 28, 65), FLMidiEvent(0xB0, 28, 62)])
+    process = h.script._processor.ProcessEvent
+    return lambda: process(next_event())
+
+
+def case_pitch_bend(h):
+    next_event = _sweep(0xE0, 0, list(range(64, 128)) + list(range(127, 63, -1)))
+    process = h.script._processor.ProcessEvent
+    return lambda: process(next_event())
+
+
+def case_on_pitch_bend(h):
+    # Wheel on a plugin channel, through the routing cache, dedup and rate limit
+    h.add_plugin_channel('FLEX')
+    next_event = _sweep(0xE0, 0, list(range(64, 128)) + list(range(127, 63, -1)))
+    on_pitch_bend = h.script.OnPitchBend
+    return lambda: on_pitch_bend(next_event())
+
+
+def case_note_snap_to_scale(h):
+    h.pad(36)
+    h.pad(36, False)
+    event = FLMidiEvent(0x90, 60, 100)
+    process = h.script._processor.ProcessEvent
+
+    def run():
+        event.data1 = 61
+        event.handled = False
+        process(event)
+    return run
+
+
+def case_plugin(h):
+    import MiniLab3Plugin
+    h.focus(WidPlugin)
+    # Last recognized plugin: worst case of the plugin name lookup
+    h.add_plugin_channel('Transistor Bass')
+    next_event = _sweep(0xB0, 117, range(128))
+    plugin = MiniLab3Plugin.Plugin
+    return lambda: plugin(next_event(), 117)
+
+
+def case_refresh_display(h):
+    display = h.script._mk3.display()
+    display.SetLines(3, 50, line1='Cutoff', line2='50%')
+
+    def run():
+        # Force the frame out instead of hitting the "already displayed" shortcut
+        display._last_payload = b''
+        display._refresh_display(3, 50)
+    return run
+
+
+def case_paged_refresh(h):
+    return h.script._mk3.paged_display().Refresh
+
+
+def case_update_all(h):
+    light_return = h.script._mk3.LightReturn()
+    return lambda: light_return.updateAll(False, True)
+
+
+CASES = {
+    'ProcessEvent.drum_pad': case_drum_pad,
+    'ProcessEvent.cc_knob': case_cc_knob,
+    'ProcessEvent.fader': case_fader,
+    'ProcessEvent.knob_tick': case_knob_tick,
+    'ProcessEvent.encoder': case_encoder,
+    'ProcessEvent.pitch_bend': case_pitch_bend,
+    'OnPitchBend': case_on_pitch_bend,
+    'ProcessEvent.note_snap_to_scale': case_note_snap_to_scale,
+    'MiniLab3Plugin.Plugin': case_plugin,
+    'MiniLabDisplay._refresh_display': case_refresh_display,
+    'MiniLabPagedDisplay.Refresh': case_paged_refresh,
+    'MiniLabLightReturn.updateAll': case_update_all,
+}
+
+
+def time_call(fn, number, repeat):
+    # Best per-call time of "repeat" rounds of "number" calls, in microseconds
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = (time.perf_counter() - start) / number
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1e6
+
+
+def run_cases(names=None, number=2000, repeat=5):
+    results = {}
+    for name, setup in CASES.items():
+        if names and name not in names:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            h = Harness().init()
+            fn = setup(h)
+            h.clear_output()
+            results[name] = time_call(fn, number, repeat)
+    return results
+
+
+def save_baseline(results, path):
+    data = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cases': {name: {'per_call_us': value} for name, value in results.items()},
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        data = json.load(f)
+    return {name: case['per_call_us'] for name, case in data['cases'].items()}
+
+
+def compare(results, baseline, threshold):
+    # Returns the list of (name, baseline, current, change %) slower than the threshold
+    regressions = []
+    for name, current in results.items():
+        if name not in baseline:
+            continue
+        change = 100.0 * (current - baseline[name]) / baseline[name]
+        if change > threshold:
+            regressions.append((name, baseline[name], current, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the hot callbacks of the MiniLab 3 script.')
+    parser.add_argument('cases', nargs='*', help='Cases to run, all by default')
+    parser.add_argument('--number', type=int, default=2000, help='Calls per round')
+    parser.add_argument('--repeat', type=int, default=5, help='Rounds, the best one is kept')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save', action='store_true', help='Store the results as the baseline')
+    parser.add_argument('--compare', action='store_true', help='Compare the results with the baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Maximum slowdown allowed by --compare, in percent')
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.cases if name not in CASES]
+    if unknown:
+        parser.error('unknown cases: %s (known: %s)' % (', '.join(unknown), ', '.join(CASES)))
+
+    results = run_cases(args.cases, args.number, args.repeat)
+    baseline = load_baseline(args.baseline) if args.compare else {}
+
+    for name, value in results.items():
+        line = '%-36s %9.2f us' % (name, value)
+        if name in baseline:
+            line += '   %+7.1f%%' % (100.0 * (value - baseline[name]) / baseline[name])
+        print(line)
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print('Baseline saved to', args.baseline)
+
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold)
+        for name, before, after, change in regressions:
+            print('REGRESSION %s: %.2f us -> %.2f us (%+.1f%%)' % (name, before, after, change))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
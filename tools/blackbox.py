@@ -0,0 +1,62 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Decodes the black box ring buffer written by the script (blackbox.ml3bb next to the
+# script, blackbox.ml3bb.prev for the session before).
+#
+#   python tools/blackbox.py "MiniLab 3 - Magnat Custom/blackbox.ml3bb"
+#   python tools/blackbox.py blackbox.ml3bb --last 200 --only in
+
+import argparse
+import datetime
+import os
+import sys
+
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'MiniLab 3 - Magnat Custom')
+sys.path.insert(0, SCRIPT_DIR)
+
+import MiniLab3BlackBox
+from MiniLab3BlackBox import ReadBlackBox
+
+SYSEX_HEADER = 'F0 00 20 6B 7F 42'
+
+
+def describe(record):
+    seq, timestamp, kind, status, data1, data2, payload, length = record
+    when = datetime.datetime.fromtimestamp(timestamp).strftime('%H:%M:%S.%f')[:-3]
+    if kind == MiniLab3BlackBox.KIND_IN:
+        text = 'IN  %02X %3d %3d' % (status, data1, data2)
+    else:
+        text = 'OUT %s %s F7' % (SYSEX_HEADER, payload.hex(' ').upper())
+        if length > len(payload):
+            text += ' (truncated, %d bytes)' % length
+    return '%8d %s %s' % (seq, when, text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Decode a MiniLab 3 black box file.')
+    parser.add_argument('path')
+    parser.add_argument('--last', type=int, help='Only show the last N records')
+    parser.add_argument('--only', choices=('in', 'out'), help='Only show incoming or outgoing records')
+    args = parser.parse_args(argv)
+
+    records = ReadBlackBox(args.path)
+    if args.only:
+        kind = MiniLab3BlackBox.KIND_IN if args.only == 'in' else MiniLab3BlackBox.KIND_OUT
+        records = [r for r in records if r[2] == kind]
+    if args.last:
+        records = records[-args.last:]
+    for record in records:
+        print(describe(record))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
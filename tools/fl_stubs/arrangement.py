@@ -0,0 +1,11 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Stand-in for the FL Studio "arrangement" module, only imported by the script
@@ -0,0 +1,54 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Stand-in for the FL Studio "channels" module
+
+import fl_state
+
+
+def channelCount(mode=0):
+    return len(fl_state.state.channels)
+
+
+def channelNumber(canBeNone=0, offset=0):
+    return selectedChannel(canBeNone, offset)
+
+
+def selectedChannel(canBeNone=0, offset=0, indexGlobal=0):
+    state = fl_state.state
+    if state.channel() is None:
+        return -1 if canBeNone else 0
+    return state.selected_channel
+
+
+def selectOneChannel(index):
+    fl_state.state.selected_channel = index
+
+
+def getChannelName(index, useGlobalIndex=False):
+    channel = fl_state.state.channel(index)
+    return channel.name if channel is not None else ''
+
+
+def getTargetFxTrack(index, useGlobalIndex=False):
+    channel = fl_state.state.channel(index)
+    return channel.fx_track if channel is not None else 0
+
+
+def showEditor(index, value=-1, useGlobalIndex=False):
+    channel = fl_state.state.channel(index)
+    if channel is not None:
+        channel.editor_visible = (not channel.editor_visible) if value == -1 else bool(value)
+
+
+def setChannelPitch(index, value, mode=0, useGlobalIndex=False):
+    channel = fl_state.state.channel(index)
+    if channel is not None:
+        channel.pitch = value
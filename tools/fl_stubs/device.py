@@ -0,0 +1,37 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Stand-in for the FL Studio "device" module
+
+import fl_state
+
+
+def midiOutSysex(data):
+    fl_state.state.capture_sysex(data)
+
+
+def midiOutMsg(message, *args):
+    pass
+
+
+def forwardMIDICC(message, mode=1):
+    fl_state.state.forwarded_cc.append(message)
+
+
+def isAssigned():
+    return True
+
+
+def getName():
+    return 'Minilab3 MIDI'
+
+
+def getPortNumber():
+    return 0
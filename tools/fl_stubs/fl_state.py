@@ -0,0 +1,126 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Shared, scriptable state behind the FL Studio stand-in modules.
+# Every stub module (ui, channels, mixer, ...) reads and writes this object, so a
+# test or a benchmark can set up a project before driving the script callbacks.
+
+import time
+
+
+class FLChannel:
+    def __init__(self, name, plugin_name=None, params=None, fx_track=0):
+        self.name = name
+        # Name of the generator plugin or None when the channel has no plugin (e.g. a sampler)
+        self.plugin_name = plugin_name
+        # List of [name, value] with value in 0..1
+        self.params = [list(p) for p in (params or [])]
+        self.fx_track = fx_track
+        self.pitch = 0
+        self.editor_visible = False
+        self.preset = 0
+
+
+class FLMixerTrack:
+    def __init__(self, name):
+        self.name = name
+        self.volume = 0.8
+        self.pan = 0.0
+        self.stereo_sep = 0.0
+        self.armed = False
+
+
+class FLState:
+    def __init__(self):
+        # UI
+        self.focused = 1
+        self.visible = set([0, 1, 2, 4])
+        self.prog_title = 'FL Studio'
+        self.hint_msg = ''
+        self.snap_mode = 3
+        self.popup_menu = False
+
+        # Browser, a flat list of (caption, file_type)
+        self.browser = [('Sample %d' % i, 1) for i in range(16)]
+        self.browser_index = 0
+
+        # Channel rack
+        self.channels = [FLChannel('Kick'), FLChannel('FLEX', 'FLEX', [['Param %d' % i, 0.5] for i in range(40)])]
+        self.selected_channel = 0
+
+        # Mixer
+        self.tracks = [FLMixerTrack('Master')] + [FLMixerTrack('Insert %d' % i) for i in range(1, 126)]
+        self.track_number = 0
+        self.tempo = 130000
+
+        # Transport
+        self.playing = False
+        self.recording = False
+        self.song_pos = 0
+        self.loop_rec = False
+        self.step_edit = False
+        self.start_on_input = False
+        self.metronome = False
+        self.overdub = False
+
+        # Patterns
+        self.pattern_number = 1
+        self.pattern_names = {1: 'Pattern 1'}
+
+        # General
+        self.undo_count = 0
+
+        # Captured output
+        self.sysex_out = []
+        self.sysex_times = []
+        self.forwarded_cc = []
+        self.global_transport = []
+        # Functions called with (data, timestamp) for every sysex sent, see simulator.py
+        self.sysex_listeners = []
+
+    def channel(self, index=None):
+        if index is None:
+            index = self.selected_channel
+        if 0 <= index < len(self.channels):
+            return self.channels[index]
+        return None
+
+    def focused_plugin_name(self):
+        # Plugin name of the focused plugin window or '' if no plugin window is focused
+        if self.focused != 5:
+            return ''
+        channel = self.channel()
+        if channel is None or channel.plugin_name is None:
+            return ''
+        return channel.plugin_name
+
+    def capture_sysex(self, data):
+        data = bytes(data)
+        timestamp = time.perf_counter()
+        self.sysex_out.append(data)
+        self.sysex_times.append(timestamp)
+        for listener in self.sysex_listeners:
+            listener(data, timestamp)
+
+    def clear_output(self):
+        self.sysex_out = []
+        self.sysex_times = []
+        self.forwarded_cc = []
+        self.global_transport = []
+
+
+state = FLState()
+
+
+def reset():
+    # Replace the state with a fresh default project
+    global state
+    state = FLState()
+    return state
@@ -0,0 +1,29 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Stand-in for the FL Studio "general" module
+
+import fl_state
+
+
+def undoUp():
+    fl_state.state.undo_count -= 1
+
+
+def undoDown():
+    fl_state.state.undo_count += 1
+
+
+def undo():
+    fl_state.state.undo_count -= 1
+
+
+def getVersion():
+    return 36
@@ -0,0 +1,109 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Stand-in for the FL Studio "midi" constants module
+
+# MIDI status
+MIDI_NOTEOFF = 0x80
+MIDI_NOTEON = 0x90
+MIDI_KEYAFTERTOUCH = 0xA0
+MIDI_CONTROLCHANGE = 0xB0
+MIDI_PROGRAMCHANGE = 0xC0
+MIDI_CHANAFTERTOUCH = 0xD0
+MIDI_PITCHBEND = 0xE0
+MIDI_SYSTEMMESSAGE = 0xF0
+MIDI_BEGINSYSEX = 0xF0
+MIDI_ENDSYSEX = 0xF7
+
+# Windows
+widMixer = 0
+widChannelRack = 1
+widPlaylist = 2
+widPianoRoll = 3
+widBrowser = 4
+widPlugin = 5
+
+# Global transport commands
+FPT_Jog = 0
+FPT_Jog2 = 1
+FPT_Strip = 2
+FPT_StripJog = 3
+FPT_StripHold = 4
+FPT_Previous = 5
+FPT_Next = 6
+FPT_MoveJog = 7
+FPT_Play = 10
+FPT_Stop = 11
+FPT_Record = 12
+FPT_Rewind = 13
+FPT_FastForward = 14
+FPT_Loop = 15
+FPT_Mute = 16
+FPT_Mode = 17
+FPT_Undo = 20
+FPT_UndoUp = 21
+FPT_UndoJog = 22
+FPT_Punch = 30
+FPT_PunchIn = 31
+FPT_PunchOut = 32
+FPT_AddMarker = 33
+FPT_AddAltMarker = 34
+FPT_MarkerJumpJog = 35
+FPT_MarkerSelJog = 36
+FPT_Up = 40
+FPT_Down = 41
+FPT_Left = 42
+FPT_Right = 43
+FPT_HZoomJog = 44
+FPT_VZoomJog = 45
+FPT_Snap = 48
+FPT_SnapMode = 49
+FPT_Cut = 50
+FPT_Copy = 51
+FPT_Paste = 52
+FPT_Insert = 53
+FPT_Delete = 54
+FPT_NextWindow = 58
+FPT_WindowJog = 59
+FPT_F1 = 60
+FPT_F2 = 61
+FPT_F3 = 62
+FPT_F4 = 63
+FPT_F5 = 64
+FPT_F6 = 65
+FPT_F7 = 66
+FPT_F8 = 67
+FPT_F9 = 68
+FPT_F10 = 69
+FPT_Enter = 80
+FPT_Escape = 81
+FPT_Yes = 82
+FPT_No = 83
+FPT_Menu = 90
+FPT_ItemMenu = 91
+FPT_Save = 92
+FPT_SaveNew = 93
+FPT_PatternJog = 100
+FPT_TrackJog = 101
+FPT_ChannelJog = 102
+FPT_TempoJog = 105
+FPT_TapTempo = 106
+FPT_NudgeMinus = 107
+FPT_NudgePlus = 108
+FPT_Metronome = 110
+FPT_WaitForInput = 111
+FPT_Overdub = 112
+FPT_LoopRecord = 113
+FPT_StepEdit = 114
+FPT_CountDown = 115
+FPT_NextMixerWindow = 116
+FPT_MixerWindowJog = 117
+FPT_ShuffleJog = 118
+FPT_ArrangementJog = 119
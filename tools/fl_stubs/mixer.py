@@ -0,0 +1,62 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Stand-in for the FL Studio "mixer" module
+
+import fl_state
+
+
+def trackNumber():
+    return fl_state.state.track_number
+
+
+def setTrackNumber(trackNumber, flags=0):
+    fl_state.state.track_number = trackNumber
+
+
+def trackCount():
+    return len(fl_state.state.tracks)
+
+
+def getTrackName(index):
+    return fl_state.state.tracks[index].name
+
+
+def getTrackVolume(index, mode=0):
+    return fl_state.state.tracks[index].volume
+
+
+def setTrackVolume(index, volume, pickupMode=0):
+    fl_state.state.tracks[index].volume = volume
+
+
+def getTrackPan(index):
+    return fl_state.state.tracks[index].pan
+
+
+def setTrackPan(index, pan, pickupMode=0):
+    fl_state.state.tracks[index].pan = pan
+
+
+def getTrackStereoSep(index):
+    return fl_state.state.tracks[index].stereo_sep
+
+
+def armTrack(index):
+    track = fl_state.state.tracks[index]
+    track.armed = not track.armed
+
+
+def getSongTickPos(mode=0):
+    return fl_state.state.song_pos
+
+
+def getCurrentTempo(asInt=0):
+    return fl_state.state.tempo
@@ -0,0 +1,25 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Stand-in for the FL Studio "patterns" module
+
+import fl_state
+
+
+def patternNumber():
+    return fl_state.state.pattern_number
+
+
+def patternCount():
+    return len(fl_state.state.pattern_names)
+
+
+def getPatternName(index):
+    return fl_state.state.pattern_names.get(index, 'Pattern %d' % index)
@@ -0,0 +1,69 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Stand-in for the FL Studio "plugins" module
+
+import fl_state
+
+
+def _channel(index):
+    return fl_state.state.channel(index)
+
+
+def isValid(index, slotIndex=-1, useGlobalIndex=False):
+    channel = _channel(index)
+    return channel is not None and channel.plugin_name is not None
+
+
+def getPluginName(index, slotIndex=-1, userName=0, useGlobalIndex=False):
+    channel = _channel(index)
+    if channel is None or channel.plugin_name is None:
+        return ''
+    return channel.plugin_name
+
+
+def getParamCount(index, slotIndex=-1, useGlobalIndex=False):
+    channel = _channel(index)
+    return len(channel.params) if channel is not None else 0
+
+
+def _param(paramIndex, index):
+    channel = _channel(index)
+    if channel is None or not 0 <= paramIndex < len(channel.params):
+        return None
+    return channel.params[paramIndex]
+
+
+def getParamName(paramIndex, index, slotIndex=-1, useGlobalIndex=False):
+    param = _param(paramIndex, index)
+    return param[0] if param is not None else ''
+
+
+def getParamValue(paramIndex, index, slotIndex=-1, useGlobalIndex=False):
+    param = _param(paramIndex, index)
+    return param[1] if param is not None else 0.0
+
+
+def setParamValue(value, paramIndex, index, slotIndex=-1, pickupMode=0, useGlobalIndex=False):
+    param = _param(paramIndex, index)
+    if param is not None:
+        param[1] = value
+
+
+def nextPreset(index, slotIndex=-1, useGlobalIndex=False):
+    channel = _channel(index)
+    if channel is not None:
+        channel.preset += 1
+
+
+def prevPreset(index, slotIndex=-1, useGlobalIndex=False):
+    channel = _channel(index)
+    if channel is not None:
+        channel.preset -= 1
@@ -0,0 +1,68 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Stand-in for the FL Studio "transport" module
+
+import fl_state
+import midi
+
+
+def start():
+    fl_state.state.playing = not fl_state.state.playing
+
+
+def stop():
+    fl_state.state.playing = False
+    fl_state.state.song_pos = 0
+
+
+def record():
+    fl_state.state.recording = not fl_state.state.recording
+
+
+def isPlaying():
+    return 1 if fl_state.state.playing else 0
+
+
+def isRecording():
+    return 1 if fl_state.state.recording else 0
+
+
+def getSongPos(mode=-1):
+    return fl_state.state.song_pos
+
+
+def setSongPos(position, mode=-1):
+    fl_state.state.song_pos = max(0, int(position))
+
+
+def getSongPosHint():
+    ticks = fl_state.state.song_pos
+    return '%d:%02d:%03d' % (ticks // 384 + 1, (ticks // 96) % 4 + 1, ticks % 96)
+
+
+_TOGGLES = {
+    midi.FPT_LoopRecord: 'loop_rec',
+    midi.FPT_StepEdit: 'step_edit',
+    midi.FPT_WaitForInput: 'start_on_input',
+    midi.FPT_Metronome: 'metronome',
+    midi.FPT_Overdub: 'overdub',
+}
+
+
+def globalTransport(command, value, pmeflags=0, flags=0):
+    state = fl_state.state
+    state.global_transport.append((command, value))
+    if command in _TOGGLES:
+        name = _TOGGLES[command]
+        setattr(state, name, not getattr(state, name))
+    elif command in (midi.FPT_Enter, midi.FPT_Escape, midi.FPT_No):
+        state.popup_menu = False
+    return 1
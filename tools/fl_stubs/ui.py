@@ -0,0 +1,112 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Stand-in for the FL Studio "ui" module
+
+import fl_state
+
+
+def getFocused(index):
+    return fl_state.state.focused == index
+
+
+def setFocused(index):
+    fl_state.state.focused = index
+    fl_state.state.visible.add(index)
+
+
+def getVisible(index):
+    return index in fl_state.state.visible
+
+
+def showWindow(index):
+    fl_state.state.visible.add(index)
+
+
+def hideWindow(index):
+    fl_state.state.visible.discard(index)
+
+
+def getFocusedPluginName():
+    return fl_state.state.focused_plugin_name()
+
+
+def getFocusedNodeCaption():
+    state = fl_state.state
+    if not state.browser:
+        return ''
+    return state.browser[state.browser_index][0]
+
+
+def getFocusedNodeFileType():
+    state = fl_state.state
+    if not state.browser:
+        return -1
+    return state.browser[state.browser_index][1]
+
+
+def selectBrowserMenuItem():
+    fl_state.state.popup_menu = True
+
+
+def isInPopupMenu():
+    return fl_state.state.popup_menu
+
+
+def _move(step):
+    state = fl_state.state
+    if state.focused == 4 and state.browser:
+        state.browser_index = (state.browser_index + step) % len(state.browser)
+    elif state.focused == 1 and state.channels:
+        state.selected_channel = (state.selected_channel + step) % len(state.channels)
+
+
+def next():
+    _move(1)
+
+
+def previous():
+    _move(-1)
+
+
+def up():
+    _move(-1)
+
+
+def down():
+    _move(1)
+
+
+def getHintMsg():
+    return fl_state.state.hint_msg
+
+
+def getProgTitle():
+    return fl_state.state.prog_title
+
+
+def getSnapMode():
+    return fl_state.state.snap_mode
+
+
+def getStepEditMode():
+    return fl_state.state.step_edit
+
+
+def isLoopRecEnabled():
+    return fl_state.state.loop_rec
+
+
+def isMetronomeEnabled():
+    return fl_state.state.metronome
+
+
+def isStartOnInputEnabled():
+    return fl_state.state.start_on_input
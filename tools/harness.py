@@ -0,0 +1,215 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Headless harness: loads the MiniLab 3 script against the FL Studio stand-in modules
+# of fl_stubs/ and drives its entry points (OnInit, OnMidiMsg, OnIdle, OnRefresh...)
+# the way FL Studio does, so the script can run on a plain Python install.
+#
+#   from harness import Harness
+#   h = Harness()
+#   h.init()
+#   h.cc(86, 70)
+#   h.idle()
+#   print(h.state.sysex_out)
+#
+# Only one harness can be live per process: the script keeps its state in module globals.
+
+import importlib
+import os
+import sys
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+STUBS_DIR = os.path.join(TOOLS_DIR, 'fl_stubs')
+SCRIPT_DIR = os.path.join(os.path.dirname(TOOLS_DIR), 'MiniLab 3 - Magnat Custom')
+SCRIPT_MODULE = 'device_MiniLab3'
+
+# FL Studio calls a specific handler when OnMidiMsg leaves the event unhandled
+_SPECIFIC_HANDLERS = {
+    0x80: 'OnNoteOff',
+    0x90: 'OnNoteOn',
+    0xB0: 'OnControlChange',
+    0xE0: 'OnPitchBend',
+}
+
+
+def install_paths():
+    # The stubs must win over anything else named "midi" or "device" on sys.path
+    for path in (SCRIPT_DIR, STUBS_DIR):
+        if path in sys.path:
+            sys.path.remove(path)
+        sys.path.insert(0, path)
+
+
+def script_module_names():
+    return [name[:-3] for name in os.listdir(SCRIPT_DIR) if name.endswith('.py')]
+
+
+install_paths()
+
+import fl_state
+
+
+class FLMidiEvent:
+    """ Plain stand-in for the eventData object FL Studio passes to the script. """
+
+    def __init__(self, status, data1=0, data2=0, sysex=None, port=0, timestamp=0.0):
+        self.handled = False
+        self.status = status
+        self.data1 = data1
+        self.data2 = data2
+        self.sysex = sysex
+        self.port = port
+        self.timestamp = timestamp
+        self.pmeFlags = 0
+        self.midiChanEx = status & 0x0F
+
+    @property
+    def midiId(self):
+        return self.status if self.status >= 0xF0 else self.status & 0xF0
+
+    @property
+    def midiChan(self):
+        return self.status & 0x0F
+
+    # FL exposes data1/data2 under several names depending on the message kind
+    @property
+    def controlNum(self):
+        return self.data1
+
+    @controlNum.setter
+    def controlNum(self, value):
+        self.data1 = value
+
+    @property
+    def controlVal(self):
+        return self.data2
+
+    @controlVal.setter
+    def controlVal(self, value):
+        self.data2 = value
+
+    @property
+    def note(self):
+        return self.data1
+
+    @note.setter
+    def note(self, value):
+        self.data1 = value
+
+    @property
+    def velocity(self):
+        return self.data2
+
+    @velocity.setter
+    def velocity(self, value):
+        self.data2 = value
+
+    def __repr__(self):
+        return 'FLMidiEvent(status=%d, data1=%d, data2=%d, handled=%s)' % (
+            self.status, self.data1, self.data2, self.handled)
+
+
+def load_script():
+    # (Re)import the script from scratch so it starts from a clean state
+    for name in script_module_names():
+        sys.modules.pop(name, None)
+    return importlib.import_module(SCRIPT_MODULE)
+
+
+class Harness:
+    """ Drives the script callbacks against a fresh FL stand-in project. """
+
+    def __init__(self, black_box=None):
+        install_paths()
+        self.state = fl_state.reset()
+        self.script = load_script()
+        # The black box is always on in FL, only record it here when asked for a file
+        self.script.BLACK_BOX = black_box is not None
+        if black_box is not None:
+            self.script.BLACK_BOX_FILE = black_box
+
+    # FL ENTRY POINTS
+
+    def init(self):
+        self.script.OnInit()
+        return self
+
+    def deinit(self):
+        self.script.OnDeInit()
+
+    def midi(self, status, data1=0, data2=0, sysex=None):
+        # Same order as FL: OnMidiMsg first, then the specific handler if still unhandled
+        event = FLMidiEvent(status, data1, data2, sysex)
+        self.script.OnMidiMsg(event)
+        if not event.handled:
+            name = _SPECIFIC_HANDLERS.get(event.midiId)
+            handler = getattr(self.script, name, None) if name else None
+            if handler is not None:
+                handler(event)
+        return event
+
+    def sysex(self, data):
+        # Sysex go to OnSysEx only
+        event = FLMidiEvent(0xF0, sysex=bytes(data))
+        self.script.OnSysEx(event)
+        return event
+
+    def idle(self):
+        self.script.OnIdle()
+
+    def refresh(self, flags=0):
+        self.script.OnRefresh(flags)
+
+    def beat(self, value):
+        self.script.OnUpdateBeatIndicator(value)
+
+    def waiting_for_input(self):
+        self.script.OnWaitingForInput()
+
+    # MESSAGE HELPERS
+
+    def cc(self, control, value, channel=0):
+        return self.midi(0xB0 | channel, control, value)
+
+    def note_on(self, note, velocity=100, channel=0):
+        return self.midi(0x90 | channel, note, velocity)
+
+    def note_off(self, note, channel=0):
+        return self.midi(0x80 | channel, note, 0)
+
+    def pad(self, note, pressed=True):
+        # The drum pads send notes 36-43 on MIDI channel 10
+        if pressed:
+            return self.note_on(note, 100, 9)
+        return self.note_off(note, 9)
+
+    def pitch_bend(self, value):
+        # value is the 7 bits coarse position, 64 is the center
+        return self.midi(0xE0, 0, value)
+
+    # PROJECT HELPERS
+
+    def focus(self, window):
+        self.state.focused = window
+        self.state.visible.add(window)
+
+    def add_plugin_channel(self, plugin_name, param_count=1000, select=True):
+        params = [['%s %d' % (plugin_name, i), 0.5] for i in range(param_count)]
+        self.state.channels.append(fl_state.FLChannel(plugin_name, plugin_name, params))
+        if select:
+            self.state.selected_channel = len(self.state.channels) - 1
+        return self.state.selected_channel
+
+    @property
+    def sysex_out(self):
+        return self.state.sysex_out
+
+    def clear_output(self):
+        self.state.clear_output()
@@ -0,0 +1,105 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Replays a session recorded by the script (RECORD_SESSION = True in device_MiniLab3.py)
+# against the FL stubs, either with the original timing or as fast as possible.
+#
+#   python tools/replay.py session.ml3rec                 As fast as possible
+#   python tools/replay.py session.ml3rec --realtime      With the original timing
+#   python tools/replay.py session.ml3rec --repeat 1000   Loop over the session
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+
+from harness import Harness, FLMidiEvent
+
+import MiniLab3Recorder
+from MiniLab3Recorder import ReadSession, SysexPayloads, MiniLabRecorder, CALLBACK_NAMES
+
+
+def start_recording(h, path):
+    # Record the callbacks driven through a harness, as the script would do in FL
+    h.script._recorder = MiniLabRecorder(path)
+    return h.script._recorder
+
+
+def stop_recording(h):
+    if h.script._recorder is not None:
+        h.script._recorder.Flush()
+        h.script._recorder = None
+
+
+def load(path):
+    session = ReadSession(path)
+    # One tuple per record, built once so the replay loop only calls the script
+    records = list(zip(session['time'], session['kind'], session['status'],
+                       session['data1'], session['data2'], session['flags'], SysexPayloads(session)))
+    return records
+
+
+def replay(h, records, realtime=False):
+    # Feeds the records to the script callbacks, returns the number of calls per callback
+    script = h.script
+    calls = dict.fromkeys(CALLBACK_NAMES, 0)
+    start = time.perf_counter()
+    for timestamp, kind, status, data1, data2, flags, sysex in records:
+        if realtime:
+            delay = timestamp - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+        if kind == MiniLab3Recorder.REC_MIDI_MSG:
+            event = FLMidiEvent(status, data1, data2)
+            script.OnMidiMsg(event)
+        elif kind == MiniLab3Recorder.REC_PITCH_BEND:
+            event = FLMidiEvent(status, data1, data2)
+            script.OnPitchBend(event)
+        elif kind == MiniLab3Recorder.REC_REFRESH:
+            script.OnRefresh(flags)
+        elif kind == MiniLab3Recorder.REC_IDLE:
+            script.OnIdle()
+        elif kind == MiniLab3Recorder.REC_BEAT:
+            script.OnUpdateBeatIndicator(flags)
+        elif kind == MiniLab3Recorder.REC_SYSEX:
+            script.OnSysEx(FLMidiEvent(status, sysex=sysex))
+        calls[kind] += 1
+    return calls
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a recorded MiniLab 3 session against the FL stubs.')
+    parser.add_argument('session', help='File written by the script recorder')
+    parser.add_argument('--realtime', action='store_true', help='Respect the original timing')
+    parser.add_argument('--repeat', type=int, default=1, help='Number of replays')
+    parser.add_argument('--verbose', action='store_true', help='Show what the script prints')
+    args = parser.parse_args(argv)
+
+    records = load(args.session)
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        h = Harness().init()
+        h.clear_output()
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            calls = replay(h, records, args.realtime)
+        elapsed = time.perf_counter() - start
+
+    print('%d records x %d replays in %.3f s (%.2f us per record)' % (
+        len(records), args.repeat, elapsed, 1e6 * elapsed / max(1, len(records) * args.repeat)))
+    for kind, count in calls.items():
+        print('  %-24s %d' % (CALLBACK_NAMES[kind], count))
+    print('  %-24s %d frames, %d bytes' % ('sysex out', len(h.sysex_out), sum(map(len, h.sysex_out))))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Runs a corpus of scenarios in parallel, each one in its own process with a fresh
+# script (new MidiControllerConfig and MiniLabMidiProcessor), and merges their timing
+# and traffic into a single report.
+#
+#   python tools/scenarios.py                         Every synthetic scenario
+#   python tools/scenarios.py --session a.ml3rec      Also replay recorded sessions
+#   python tools/scenarios.py --match plugin --json report.json
+#
+# Scenario names: browser_scroll, snap_to_scale, channel_rack_scroll, plugin_sweep:<plugin name>
+# (one per plugin known by MiniLab3Plugin) and session:<path>.
+
+import argparse
+import ast
+import concurrent.futures
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+from harness import Harness, SCRIPT_DIR
+
+WidChannelRack = 1
+WidBrowser = 4
+WidPlugin = 5
+
+KNOBS = (86, 87, 89, 90, 110, 111, 116, 117)
+FADERS = (14, 15, 30, 31)
+
+
+def plugin_names():
+    # Plugins with a mapping in MiniLab3Plugin.Plugin, read from its "plugin_name == '...'" tests
+    with open(os.path.join(SCRIPT_DIR, 'MiniLab3Plugin.py'), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Compare) and isinstance(node.left, ast.Name) and node.left.id == 'plugin_name'
+                and isinstance(node.comparators[0], ast.Constant)):
+            names.append(node.comparators[0].value)
+    return names
+
+
+# SCENARIOS
+# Each scenario drives a harness and returns the number of events sent.
+
+def browser_scroll(h, steps=2000):
+    h.state.browser = [('Sample %04d.wav' % i, 1) for i in range(2000)]
+    h.focus(WidBrowser)
+    for i in range(steps):
+        h.cc(28, 65 if (i // 500) % 2 == 0 else 62)
+        if i % 10 == 0:
+            h.idle()
+    return steps
+
+
+def channel_rack_scroll(h, steps=500):
+    for i in range(16):
+        h.add_plugin_channel('3x Osc', 30, select=False)
+    h.focus(WidChannelRack)
+    for i in range(steps):
+        h.cc(28, 65 if (i // 50) % 2 == 0 else 62)
+        if i % 10 == 0:
+            h.idle()
+    return steps
+
+
+def plugin_sweep(h, plugin_name, sweeps=4):
+    h.add_plugin_channel(plugin_name)
+    h.focus(WidPlugin)
+    count = 0
+    for control in KNOBS + FADERS:
+        for _ in range(sweeps):
+            for value in range(0, 128, 2):
+                h.cc(control, value)
+                count += 1
+            h.idle()
+    return count
+
+
+def snap_to_scale(h, notes=2000):
+    h.pad(36)
+    h.pad(36, False)
+    for i in range(notes):
+        note = 48 + (i * 7) % 24
+        h.note_on(note)
+        h.note_off(note)
+        if i % 10 == 0:
+            h.idle()
+    return 2 * notes
+
+
+def replay_session(h, path):
+    import replay
+    records = replay.load(path)
+    replay.replay(h, records)
+    return len(records)
+
+
+SCENARIOS = {
+    'browser_scroll': browser_scroll,
+    'channel_rack_scroll': channel_rack_scroll,
+    'snap_to_scale': snap_to_scale,
+}
+
+
+def scenario_names(sessions=()):
+    names = list(SCENARIOS)
+    names += ['plugin_sweep:' + name for name in plugin_names()]
+    names += ['session:' + path for path in sessions]
+    return names
+
+
+def run_scenario(name):
+    # Worker: runs one scenario against a fresh script, returns its figures
+    with contextlib.redirect_stdout(io.StringIO()):
+        h = Harness().init()
+        h.clear_output()
+        start = time.perf_counter()
+        if name.startswith('plugin_sweep:'):
+            events = plugin_sweep(h, name.split(':', 1)[1])
+        elif name.startswith('session:'):
+            events = replay_session(h, name.split(':', 1)[1])
+        else:
+            events = SCENARIOS[name](h)
+        elapsed = time.perf_counter() - start
+    return {
+        'scenario': name,
+        'events': events,
+        'seconds': elapsed,
+        'us_per_event': 1e6 * elapsed / max(1, events),
+        'sysex_frames': len(h.sysex_out),
+        'sysex_bytes': sum(map(len, h.sysex_out)),
+        'forwarded_cc': len(h.state.forwarded_cc),
+    }
+
+
+def run_all(names, workers=None):
+    # Results in the order of the names
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_scenario, names))
+
+
+def merge(results):
+    total_events = sum(r['events'] for r in results)
+    total_seconds = sum(r['seconds'] for r in results)
+    return {
+        'scenarios': results,
+        'total': {
+            'events': total_events,
+            'seconds': total_seconds,
+            'us_per_event': 1e6 * total_seconds / max(1, total_events),
+            'sysex_frames': sum(r['sysex_frames'] for r in results),
+            'sysex_bytes': sum(r['sysex_bytes'] for r in results),
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the MiniLab 3 scenarios in parallel.')
+    parser.add_argument('--session', action='append', default=[], help='Recorded session to replay, repeatable')
+    parser.add_argument('--match', help='Only run the scenarios whose name contains this text')
+    parser.add_argument('--workers', type=int, help='Number of processes, one per CPU by default')
+    parser.add_argument('--json', help='Also write the report to this file')
+    args = parser.parse_args(argv)
+
+    names = [name for name in scenario_names(args.session) if not args.match or args.match in name]
+    start = time.perf_counter()
+    report = merge(run_all(names, args.workers))
+    wall = time.perf_counter() - start
+
+    print('%-40s %8s %10s %8s %8s' % ('scenario', 'events', 'us/event', 'frames', 'bytes'))
+    for r in report['scenarios'] + [dict(report['total'], scenario='TOTAL')]:
+        print('%-40s %8d %10.2f %8d %8d' % (
+            r['scenario'][:40], r['events'], r['us_per_event'], r['sysex_frames'], r['sysex_bytes']))
+    print('%d scenarios in %.1f s' % (len(names), wall))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
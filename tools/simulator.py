@@ -0,0 +1,249 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Headless MiniLab 3: decodes the sysex frames sent by the script and keeps what the
+# real controller would show (screen and pads) plus traffic counters.
+#
+#   sim = VirtualMiniLab().attach(h.state)   # h is a harness.Harness
+#   ...drive the script...
+#   print(sim.render())
+#   assert sim.snapshot() == expected
+#
+#   python tools/simulator.py session.ml3rec   Replay a session and show the final device state
+
+import argparse
+import collections
+import contextlib
+import io
+import sys
+
+HEADER = bytes([0xF0, 0x00, 0x20, 0x6B, 0x7F, 0x42])
+FOOTER = 0xF7
+
+# Screen types as sent after 0x1F, 1 is the default screen (no control block)
+SCREEN_DEFAULT = 1
+SCREEN_TWO_LINES = 0x02
+SCREEN_ENCODER = 0x03
+SCREEN_FADER = 0x04
+SCREEN_SCROLL = 0x05
+SCREEN_PICTO = 0x07
+
+# Number of parameters after "0x1F type 0x01" for each screen type
+SCREEN_PARAMS = {
+    SCREEN_TWO_LINES: 1,
+    SCREEN_ENCODER: 3,
+    SCREEN_FADER: 3,
+    SCREEN_SCROLL: 3,
+    SCREEN_PICTO: 4,
+}
+
+SCREEN_NAMES = {
+    SCREEN_DEFAULT: 'default',
+    SCREEN_TWO_LINES: 'two lines',
+    SCREEN_ENCODER: 'encoder',
+    SCREEN_FADER: 'fader',
+    SCREEN_SCROLL: 'scroll',
+    SCREEN_PICTO: 'picto',
+}
+
+# LED ids of the 8 pads, in pad order
+PAD_IDS = (0x04, 0x05, 0x06, 0x07, 0x08, 0x09, 0x0A, 0x0B)
+
+# Traffic categories
+CAT_DISPLAY = 'display'
+CAT_PAD = 'pad'
+CAT_ALL_PADS = 'all_pads'
+CAT_CONNECTION = 'connection'
+CAT_OTHER = 'other'
+
+Snapshot = collections.namedtuple('Snapshot', 'line1 line2 screen_type value picto pads leds')
+
+
+class VirtualMiniLab:
+
+    def __init__(self, window_s=1.0):
+        self.line1 = ''
+        self.line2 = ''
+        self.screen_type = SCREEN_DEFAULT
+        # Value bar of the encoder and fader screens, 0..127
+        self.value = 0
+        # (record, play) pictograms of the picto screen
+        self.picto = (0, 0)
+        self.pads = [(0, 0, 0)] * len(PAD_IDS)
+        # Other LEDs addressed by id
+        self.leds = {}
+        # DAW / Arturia mode messages received, in order
+        self.connection = []
+
+        self.frames = 0
+        self.bytes = 0
+        self.frames_by_category = collections.Counter()
+        self.bytes_by_category = collections.Counter()
+        self.unknown = []
+        self._window_s = window_s
+        self._window = collections.deque()
+        self._first_time = None
+        self._last_time = None
+
+    def attach(self, state):
+        # Listen to the sysex captured by an fl_stubs state
+        state.sysex_listeners.append(self.feed)
+        return self
+
+    # DECODING
+
+    def feed(self, frame, timestamp=0.0):
+        frame = bytes(frame)
+        self._count(frame, timestamp)
+        if not frame.startswith(HEADER) or frame[-1] != FOOTER:
+            self._category(CAT_OTHER, frame)
+            self.unknown.append(frame)
+            return
+        payload = frame[len(HEADER):-1]
+
+        if payload[:3] == b'\x04\x02\x60':
+            self._category(CAT_DISPLAY, frame)
+            self._decode_display(payload[3:])
+        elif payload[:3] == b'\x02\x02\x16' and len(payload) >= 7:
+            self._category(CAT_PAD, frame)
+            self._set_led(payload[3], tuple(payload[4:7]))
+        elif payload[:4] == b'\x04\x02\x16\x00' and len(payload) >= 4 + 3 * len(PAD_IDS):
+            self._category(CAT_ALL_PADS, frame)
+            colors = payload[4:]
+            self.pads = [tuple(colors[3 * i:3 * i + 3]) for i in range(len(PAD_IDS))]
+        elif payload[:4] == b'\x02\x02\x40\x6A' or payload[:3] == b'\x04\x01\x60' or payload[:4] == b'\x01\x00\x40\x01':
+            self._category(CAT_CONNECTION, frame)
+            self.connection.append(payload)
+        else:
+            self._category(CAT_OTHER, frame)
+            self.unknown.append(frame)
+
+    def _decode_display(self, body):
+        screen_type = SCREEN_DEFAULT
+        value = self.value
+        picto = self.picto
+        line1 = ''
+        line2 = ''
+        i = 0
+        while i < len(body):
+            tag = body[i]
+            if tag == 0x1F:
+                screen_type = body[i + 1]
+                params = body[i + 3:i + 3 + SCREEN_PARAMS.get(screen_type, 0)]
+                if screen_type in (SCREEN_ENCODER, SCREEN_FADER):
+                    value = params[0]
+                elif screen_type == SCREEN_PICTO:
+                    picto = (params[0], params[1])
+                i += 3 + len(params)
+            elif tag in (0x01, 0x02):
+                end = body.index(0x00, i + 1)
+                text = body[i + 1:end].decode('ascii', 'replace')
+                if tag == 0x01:
+                    line1 = text
+                else:
+                    line2 = text
+                i = end + 1
+            else:
+                i += 1
+        self.screen_type = screen_type
+        self.value = value
+        self.picto = picto
+        self.line1 = line1
+        self.line2 = line2
+
+    def _set_led(self, led_id, color):
+        if led_id in PAD_IDS:
+            self.pads[PAD_IDS.index(led_id)] = color
+        else:
+            self.leds[led_id] = color
+
+    # TRAFFIC
+
+    def _count(self, frame, timestamp):
+        self.frames += 1
+        self.bytes += len(frame)
+        if self._first_time is None:
+            self._first_time = timestamp
+        self._last_time = timestamp
+        self._window.append((timestamp, len(frame)))
+        while self._window and self._window[0][0] < timestamp - self._window_s:
+            self._window.popleft()
+
+    def _category(self, category, frame):
+        self.frames_by_category[category] += 1
+        self.bytes_by_category[category] += len(frame)
+
+    def rates(self):
+        # (frames/s, bytes/s) over the last window and over the whole run
+        window_frames = len(self._window)
+        window_bytes = sum(size for _, size in self._window)
+        duration = (self._last_time - self._first_time) if self._first_time is not None else 0
+        if duration <= 0:
+            return (window_frames / self._window_s, window_bytes / self._window_s, 0.0, 0.0)
+        return (window_frames / self._window_s, window_bytes / self._window_s,
+                self.frames / duration, self.bytes / duration)
+
+    # STATE
+
+    def snapshot(self):
+        return Snapshot(self.line1, self.line2, self.screen_type, self.value, self.picto,
+                        tuple(self.pads), tuple(sorted(self.leds.items())))
+
+    def render(self, color=True):
+        width = 32
+        lines = ['+' + '-' * width + '+']
+        lines.append('|' + self.line1[:width].ljust(width) + '|')
+        lines.append('|' + self.line2[:width].ljust(width) + '|')
+        if self.screen_type in (SCREEN_ENCODER, SCREEN_FADER):
+            filled = round(self.value * width / 127)
+            lines.append('|' + ('#' * filled).ljust(width) + '|')
+        lines.append('+' + '-' * width + '+')
+        lines.append('screen: %s  value: %d  rec/play: %d/%d' % (
+            SCREEN_NAMES.get(self.screen_type, hex(self.screen_type)), self.value, self.picto[0], self.picto[1]))
+
+        pads = []
+        for r, g, b in self.pads:
+            if color:
+                # MiniLab colors are 7 bits
+                pads.append('\x1b[48;2;%d;%d;%dm    \x1b[0m' % (r * 2, g * 2, b * 2))
+            else:
+                pads.append('%02X%02X%02X' % (r, g, b))
+        lines.append('pads: ' + ' '.join(pads))
+
+        window_fps, window_bps, fps, bps = self.rates()
+        lines.append('traffic: %d frames, %d bytes (last %.0fs: %.1f frames/s, %.0f bytes/s; average: %.1f frames/s, %.0f bytes/s)' % (
+            self.frames, self.bytes, self._window_s, window_fps, window_bps, fps, bps))
+        for category in sorted(self.frames_by_category):
+            lines.append('  %-12s %6d frames %8d bytes' % (
+                category, self.frames_by_category[category], self.bytes_by_category[category]))
+        return '\n'.join(lines)
+
+
+def main(argv=None):
+    from harness import Harness
+    import replay
+
+    parser = argparse.ArgumentParser(description='Replay a session and show the virtual MiniLab 3 state.')
+    parser.add_argument('session', help='File written by the script recorder')
+    parser.add_argument('--no-color', action='store_true', help='Print the pad colors as hex values')
+    args = parser.parse_args(argv)
+
+    records = replay.load(args.session)
+    with contextlib.redirect_stdout(io.StringIO()):
+        h = Harness()
+        sim = VirtualMiniLab().attach(h.state)
+        h.init()
+        replay.replay(h, records)
+    print(sim.render(color=not args.no_color))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+[[
+	Surface:	MiniLab3
+	Developer:	Farès MEZDOUR
+	Version:	1.0.1
+
+    Copyright (c) 2022 Farès MEZDOUR
+]]
+"""
+
+# Worst case input streams for the script, and a saturation search: each stream is played
+# in real time at increasing rates, with OnIdle ticking as in FL, until the mean cost of an
+# event goes over the budget or the script falls behind the stream. The cost of an event
+# includes its share of the OnIdle ticks, where the knob and fader values are applied.
+#
+#   python tools/stress.py                         Every stream, 500 us budget
+#   python tools/stress.py knobs_faders --budget-us 200
+#
+# Streams: knobs_faders, pitch_bend, drum_roll, encoder_spin, mixed.
+
+import argparse
+import contextlib
+import io
+import itertools
+import sys
+import time
+
+from harness import Harness, FLMidiEvent
+
+WidBrowser = 4
+WidPlugin = 5
+
+KNOB_ID = (86, 87, 89, 90, 110, 111, 116, 117)
+FADER_ID = (14, 15, 30, 31)
+DRUM_PADS = range(36, 44)
+
+# FL calls OnIdle about every 20 ms
+IDLE_INTERVAL_S = 0.02
+
+DEFAULT_BUDGET_US = 500.0
+
+
+# STREAMS
+# Infinite iterators of (status, data1, data2)
+
+def knobs_faders():
+    # All 8 knobs and 4 faders turning at once, each one sweeping up and down
+    sweep = list(range(128)) + list(range(127, -1, -1))
+    controls = KNOB_ID + FADER_ID
+    for step in itertools.count():
+        value = sweep[step % len(sweep)]
+        for control in controls:
+            yield (0xB0, control, value)
+
+
+def pitch_bend():
+    # Every position of the wheel, back and forth
+    sweep = list(range(128)) + list(range(127, -1, -1))
+    for step in itertools.count():
+        yield (0xE0, 0, sweep[step % len(sweep)])
+
+
+def drum_roll():
+    # 16th notes on the 8 pads: a press and a release per pad
+    for step in itertools.count():
+        pad = DRUM_PADS[step % len(DRUM_PADS)]
+        yield (0x99, pad, 100)
+        yield (0x89, pad, 0)
+
+
+def encoder_spin():
+    # Main encoder spun fast in both directions, over the whole velocity range
+    for step in itertools.count():
+        if (step // 64) % 2 == 0:
+            yield (0xB0, 28, 65 + step % 8)
+        else:
+            yield (0xB0, 28, 55 + step % 8)
+
+
+def mixed():
+    # The streams above interleaved
+    sources = [knobs_faders(), pitch_bend(), drum_roll(), encoder_spin()]
+    for source in itertools.cycle(sources):
+        yield next(source)
+
+
+def _setup_plugin(h):
+    h.add_plugin_channel('Harmor')
+    h.focus(WidPlugin)
+
+
+def _setup_browser(h):
+    h.state.browser = [('Sample %04d.wav' % i, 1) for i in range(2000)]
+    h.focus(WidBrowser)
+
+
+STREAMS = {
+    'knobs_faders': (knobs_faders, _setup_plugin),
+    'pitch_bend': (pitch_bend, _setup_plugin),
+    'drum_roll': (drum_roll, None),
+    'encoder_spin': (encoder_spin, _setup_browser),
+    'mixed': (mixed, _setup_plugin),
+}
+
+
+# SATURATION
+
+def play(h, stream, rate, duration):
+    # Plays the stream at rate events/s for duration seconds, in real time.
+    # Returns (events, mean cost of the callbacks per event in s, mean cost of the idle ticks
+    # per event in s, lag at the end in s)
+    script = h.script
+    clock = time.perf_counter
+    period = 1.0 / rate
+    count = int(rate * duration)
+    busy = 0.0
+    idle_busy = 0.0
+    start = clock()
+    next_idle = start + IDLE_INTERVAL_S
+    for i in range(count):
+        due = start + i * period
+        now = clock()
+        while now < due:
+            if now >= next_idle:
+                t = clock()
+                script.OnIdle()
+                idle_busy += clock() - t
+                next_idle += IDLE_INTERVAL_S
+            else:
+                time.sleep(min(due, next_idle) - now)
+            now = clock()
+        status, data1, data2 = next(stream)
+        event = FLMidiEvent(status, data1, data2)
+        t = clock()
+        script.OnMidiMsg(event)
+        if not event.handled and status & 0xF0 == 0xE0:
+            script.OnPitchBend(event)
+        busy += clock() - t
+        if clock() >= next_idle:
+            t = clock()
+            script.OnIdle()
+            idle_busy += clock() - t
+            next_idle += IDLE_INTERVAL_S
+    lag = clock() - (start + count * period)
+    return count, busy / max(1, count), idle_busy / max(1, count), lag
+
+
+def saturation(name, budget_s, duration=0.5, start_rate=250, precision=0.05):
+    # Highest sustained rate (events/s) within the budget, found by doubling then bisecting
+    make_stream, setup = STREAMS[name]
+    with contextlib.redirect_stdout(io.StringIO()):
+        h = Harness().init()
+        if setup is not None:
+            setup(h)
+        stream = make_stream()
+
+        def sustained(rate):
+            h.clear_output()
+            events, cost, idle_cost, lag = play(h, stream, rate, duration)
+            return cost + idle_cost <= budget_s and lag <= 2 * IDLE_INTERVAL_S, (cost, idle_cost)
+
+        good, bad = 0, None
+        costs = {}
+        rate = start_rate
+        while bad is None:
+            ok, costs[rate] = sustained(rate)
+            if ok:
+                good = rate
+                rate *= 2
+            else:
+                bad = rate
+        while good and (bad - good) / bad > precision:
+            rate = (good + bad) // 2
+            ok, costs[rate] = sustained(rate)
+            if ok:
+                good = rate
+            else:
+                bad = rate
+    return good, costs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Find the event rate where the MiniLab 3 script saturates.')
+    parser.add_argument('streams', nargs='*', help='Streams to run, all by default')
+    parser.add_argument('--budget-us', type=float, default=DEFAULT_BUDGET_US, help='Maximum mean cost of an event, idle ticks included')
+    parser.add_argument('--duration', type=float, default=0.5, help='Seconds played at each rate')
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.streams if name not in STREAMS]
+    if unknown:
+        parser.error('unknown streams: %s (known: %s)' % (', '.join(unknown), ', '.join(STREAMS)))
+
+    for name in args.streams or STREAMS:
+        rate, costs = saturation(name, args.budget_us * 1e-6, args.duration)
+        detail = ', '.join('%d/s: %.1f + %.1f idle us' % (r, c * 1e6, i * 1e6) for r, (c, i) in sorted(costs.items()))
+        print('%-14s max sustained %7d events/s   (%s)' % (name, rate, detail))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())